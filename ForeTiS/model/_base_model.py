@@ -1,10 +1,11 @@
 import abc
 import optuna
 import joblib
+import pickle
 import pandas as pd
 import numpy as np
 import sklearn
-from sklearn.model_selection import train_test_split
+from ..utils import split_plan
 
 
 class BaseModel(abc.ABC):
@@ -20,11 +21,24 @@ class BaseModel(abc.ABC):
         * Instance attributes *
 
         - optuna_trial (*optuna.trial.Trial*): trial of optuna for optimization
-        - datasets (*list<pd.DataFrame>*): all datasets that are available
         - n_outputs (*int*): number of outputs of the prediction model
         - all_hyperparams (*dict*): dictionary with all hyperparameters with related info that can be tuned (structure see :obj:`~ForeTiS.model._base_model.BaseModel.define_hyperparams_to_tune`)
-        - dataset (*pd.DataFrame*): the dataset for this optimization trial
+        - dataset (*pd.DataFrame*): the dataset for this optimization trial, not persisted with the model,
+          see :obj:`~ForeTiS.model._base_model.BaseModel.attach_dataset`
+        - featureset_name (*str*): name of the featureset the dataset is based on
+        - columns (*pd.Index*): columns of the dataset
+        - seasonal_periods (*int*): how many datapoints one season has
+        - pca_transformers (*tuple*): fitted scaler and PCA transforming the featureset and the target column kept
+          as it is, None without dim reduction
         - model: model object
+        - warm_started (*bool*): whether the training starts from the fitted state of a model of a previous fold
+
+        * Class attributes *
+
+        - supports_warm_start (*bool*): whether the model can continue training from the fitted state of a model of
+          a previous, smaller fold, see :obj:`~ForeTiS.model._base_model.BaseModel.warm_start_from`
+        - warm_start_budget_fraction (*float*): fraction of the training budget (e.g. epochs or boosting rounds)
+          used if the training is warm-started
 
     :param optuna_trial: Trial of optuna for optimization
     :param datasets: all datasets that are available
@@ -34,11 +48,14 @@ class BaseModel(abc.ABC):
 
     """
 
+    supports_warm_start = False
+    warm_start_budget_fraction = 0.25
+
     # Constructor super class #
     def __init__(self, optuna_trial: optuna.trial.Trial, datasets: list, featureset: str,
                  test_set_size_percentage: int, target_column: str):
         self.optuna_trial = optuna_trial
-        self.datasets = datasets
+        self.seasonal_periods = datasets.seasonal_periods
         self.n_outputs = 1
         if not hasattr(self, 'all_hyperparams'):
             self.all_hyperparams = self.define_hyperparams_to_tune()
@@ -61,10 +78,14 @@ class BaseModel(abc.ABC):
                 if dataset.name == featureset:
                     self.dataset = dataset
                     break
+        self.featureset_name = self.dataset.name
+        self.pca_transformers = None
         if dim_reduction:
             self.dataset = self.pca_transform_train_test(test_set_size_percentage=test_set_size_percentage,
                                                          target_column=target_column)
+        self.columns = self.dataset.columns
         self.model = self.define_model()
+        self.warm_started = False
 
     # Methods required by each child class #
     @abc.abstractmethod
@@ -253,35 +274,68 @@ class BaseModel(abc.ABC):
             }
         }
 
-    def pca_transform_train_test(self, test_set_size_percentage: int, target_column: str) -> tuple:
+    def pca_transform_train_test(self, test_set_size_percentage: int, target_column: str) -> pd.DataFrame:
         """
-        Deliver PCA transformed train and test set
+        Deliver PCA transformed train and test set. The scaler and the PCA are only fitted on the train set and are
+        kept in pca_transformers, so that the transformed dataset can be rebuilt from the featureset.
+        :param test_set_size_percentage: the size of the test set in percentage
         :param target_column: target_column to add in the end
-        :return: tuple of transformed train and test dataset
+        :return: transformed train and test dataset
         """
-        if test_set_size_percentage == 2021:
-            test = self.dataset.loc['2020-01-01': '2020-12-31']
-            train_val = pd.concat([self.dataset, test]).drop_duplicates(keep=False)
-        else:
-            train_val, test = train_test_split(self.dataset,
-                                               test_size=test_set_size_percentage * 0.01,
-                                               random_state=42, shuffle=False)
+        train_val_positions, _ = split_plan.get_train_val_test_positions(
+            index=self.dataset.index, test_set_size_percentage=test_set_size_percentage, test_year=2020)
+        train_val = self.dataset.iloc[train_val_positions]
         scaler = sklearn.preprocessing.StandardScaler()
-        train_val_stand = scaler.fit_transform(train_val.drop(target_column, axis=1))
         pca = sklearn.decomposition.PCA(0.95)
-        train_val_transf = pca.fit_transform(train_val_stand)
-        test_stand = scaler.transform(test.drop(target_column, axis=1))
-        test_transf = pca.transform(test_stand)
-        train_val_data = pd.DataFrame(data=train_val_transf,
-                                      columns=['PC' + str(i) for i in range(train_val_transf.shape[1])],
-                                      index=train_val.index)
-        train_val_data[target_column] = train_val[target_column]
-        test_data = pd.DataFrame(data=test_transf, columns=['PC' + str(i) for i in range(test_transf.shape[1])],
-                                 index=test.index)
-        test_data[target_column] = test[target_column]
-        dataset = pd.concat([train_val_data, test_data])
+        pca.fit(scaler.fit_transform(train_val.drop(target_column, axis=1)))
+        self.pca_transformers = (scaler, pca, target_column)
+        return self.apply_pca_transformers(featureset=self.dataset)
+
+    def apply_pca_transformers(self, featureset: pd.DataFrame) -> pd.DataFrame:
+        """
+        Transform a featureset with the fitted scaler and PCA of the model
+        :param featureset: featureset the model was defined on
+        :return: transformed dataset with the same index
+        """
+        scaler, pca, target_column = self.pca_transformers
+        transformed = pca.transform(scaler.transform(featureset.drop(target_column, axis=1)))
+        dataset = pd.DataFrame(data=transformed, columns=['PC' + str(i) for i in range(transformed.shape[1])],
+                               index=featureset.index)
+        dataset[target_column] = featureset[target_column]
         return dataset
 
+    def attach_dataset(self, datasets) -> pd.DataFrame:
+        """
+        Attach the dataset of the model, which is not persisted with the model, from the available datasets.
+        Has to be called after loading a model before using its dataset.
+        :param datasets: all datasets that are available
+        :return: the dataset of the model
+        """
+        if self.dataset is None:
+            featureset = [dataset for dataset in datasets.datasets if dataset.name == self.featureset_name][0]
+            self.dataset = featureset if self.pca_transformers is None \
+                else self.apply_pca_transformers(featureset=featureset)
+        return self.dataset
+
+    def __getstate__(self) -> dict:
+        """
+        Persist the model without its dataset, so that snapshots and saved models only contain the model state and
+        their size does not depend on the size of the data, see attach_dataset()
+        """
+        state = self.__dict__.copy()
+        state['dataset'] = None
+        return state
+
+    def warm_start_from(self, previous_model):
+        """
+        Start the training from the fitted state of the model of the previous fold, e.g. for expanding
+        timeseries-cv folds, where each training set contains the previous one.
+        Has to be extended by the models with supports_warm_start to transfer their fitted state.
+
+        :param previous_model: fitted model of the previous fold with the same hyperparameters
+        """
+        self.warm_started = True
+
     def save_model(self, path: str, filename: str):
         """
         Persist the whole model object on a hard drive
@@ -291,3 +345,23 @@ class BaseModel(abc.ABC):
         :param filename: filename of the model
         """
         joblib.dump(self, path + filename, compress=3)
+
+    def get_snapshot(self) -> bytes:
+        """
+        Serialize the whole model object in memory
+        (can be loaded with :obj:`~ForeTiS.model._model_functions.load_model_from_snapshot`).
+        Cheaper than a round trip to the hard drive with :obj:`~ForeTiS.model._base_model.BaseModel.save_model`
+        to get several independent copies of a model, e.g. an unfitted model for each fold.
+
+        :return: serialized model
+        """
+        return pickle.dumps(self, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def get_model_size_mb(self) -> float:
+        """
+        Get the size of the serialized model object without the data, e.g. to weigh its accuracy against its
+        inference cost. Can be overwritten by child classes whose models can not be pickled.
+
+        :return: size of the model in MB
+        """
+        return len(pickle.dumps(self.model, protocol=pickle.HIGHEST_PROTOCOL)) / 1024 ** 2
@@ -1,4 +1,5 @@
 import joblib
+import pickle
 import pandas as pd
 
 from . import _base_model
@@ -32,3 +33,12 @@ def load_model(path: str, filename: str) -> _base_model.BaseModel:
     path = path + '/' if path[-1] != '/' else path
     model = joblib.load(path + filename)
     return model
+
+
+def load_model_from_snapshot(snapshot: bytes) -> _base_model.BaseModel:
+    """
+    Load model from an in-memory snapshot (see :obj:`~ForeTiS.model._base_model.BaseModel.get_snapshot`)
+    :param snapshot: serialized model
+    :return: new model instance
+    """
+    return pickle.loads(snapshot)
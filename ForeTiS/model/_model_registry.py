@@ -0,0 +1,126 @@
+import os
+import inspect
+import importlib
+
+# ! Add new models here, models only existing as file in this package are found as well, but need to be imported
+# to get their class and family !
+# family is the parent class of a model: 'baseline' | 'sklearn' | 'stat' | 'tensorflow' | 'torch'
+_MODEL_REGISTRY = {
+    'ard': {'module': 'ard', 'class': 'ARDRegression', 'family': 'sklearn'},
+    'arima': {'module': 'arima', 'class': 'Arima', 'family': 'stat'},
+    'arimax': {'module': 'arimax', 'class': 'Arima', 'family': 'stat'},
+    'averagehistorical': {'module': 'averagehistorical', 'class': 'AverageHistorical', 'family': 'baseline'},
+    'averagemoving': {'module': 'averagemoving', 'class': 'AverageMoving', 'family': 'baseline'},
+    'averageseasonal': {'module': 'averageseasonal', 'class': 'AverageSeasonal', 'family': 'baseline'},
+    'averageseasonallag': {'module': 'averageseasonallag', 'class': 'AverageSeasonal', 'family': 'baseline'},
+    'bayesridge': {'module': 'bayesridge', 'class': 'BayesianRidge', 'family': 'sklearn'},
+    'elasticnet': {'module': 'elasticnet', 'class': 'ElasticNet', 'family': 'sklearn'},
+    'es': {'module': 'es', 'class': 'Es', 'family': 'stat'},
+    'gpr': {'module': 'gpr', 'class': 'Gpr', 'family': 'sklearn', 'resources': {'cost': 100}},
+    'gprtf': {'module': 'gprtf', 'class': 'Gpr', 'family': 'tensorflow'},
+    'lasso': {'module': 'lasso', 'class': 'Lasso', 'family': 'sklearn'},
+    'lstm': {'module': 'lstm', 'class': 'LSTM', 'family': 'torch'},
+    'lstmbayes': {'module': 'lstmbayes', 'class': 'LSTM', 'family': 'torch', 'resources': {'cost': 80}},
+    'mlp': {'module': 'mlp', 'class': 'Mlp', 'family': 'torch', 'resources': {'cost': 30}},
+    'mlpbayes': {'module': 'mlpbayes', 'class': 'Mlp', 'family': 'torch', 'resources': {'cost': 40}},
+    'ridge': {'module': 'ridge', 'class': 'Ridge', 'family': 'sklearn'},
+    'xgboost': {'module': 'xgboost', 'class': 'XgBoost', 'family': 'sklearn', 'resources': {'cost': 30, 'threads': 4}},
+}
+
+# default resource demand of the families to schedule the studies of several models at once, can be overwritten
+# per model with 'resources' in the registry: cost is the relative runtime of a study, threads the number of cores
+# a trial uses and memory_factor the memory of a trial as multiple of the size of the featureset
+_FAMILY_RESOURCES = {
+    'baseline': {'cost': 1, 'threads': 1, 'memory_factor': 2},
+    'sklearn': {'cost': 5, 'threads': 1, 'memory_factor': 4},
+    'stat': {'cost': 20, 'threads': 1, 'memory_factor': 4},
+    'tensorflow': {'cost': 80, 'threads': 4, 'memory_factor': 10},
+    'torch': {'cost': 60, 'threads': 4, 'memory_factor': 8},
+}
+
+# mapping of the parent class modules to the families
+_FAMILY_MODULES = {
+    'ForeTiS.model._baseline_model': 'baseline',
+    'ForeTiS.model._sklearn_model': 'sklearn',
+    'ForeTiS.model._stat_model': 'stat',
+    'ForeTiS.model._tensorflow_model': 'tensorflow',
+    'ForeTiS.model._torch_model': 'torch',
+}
+
+# classes of the models that were already imported
+_loaded_model_classes = {}
+
+
+def get_model_names() -> list:
+    """
+    Get the names of all implemented models without importing them.
+    These are the registered models and all further model files in this package (not starting with '_').
+
+    :return: sorted list of model names
+    """
+    model_files = [file[:-3] for file in os.listdir(os.path.dirname(os.path.abspath(__file__)))
+                   if file[-3:] == '.py' and file[0] != '_']
+    return sorted(set(_MODEL_REGISTRY.keys()).union(model_files))
+
+
+def get_model_module(model_name: str) -> str:
+    """
+    Get the full name of the module containing a model
+
+    :param model_name: name of the model according to naming of .py file in package model
+
+    :return: module name
+    """
+    return 'ForeTiS.model.' + _MODEL_REGISTRY.get(model_name, {'module': model_name})['module']
+
+
+def get_model_class(model_name: str) -> type:
+    """
+    Get the class of a model. Its module is only imported on first use, afterwards the class is cached.
+
+    :param model_name: name of the model according to naming of .py file in package model
+
+    :return: class of the model
+    """
+    if model_name not in _loaded_model_classes:
+        if model_name not in get_model_names():
+            raise Exception('Model ' + model_name + ' not found in implemented models: ' + str(get_model_names()))
+        module_name = get_model_module(model_name=model_name)
+        module = importlib.import_module(module_name)
+        if model_name in _MODEL_REGISTRY:
+            _loaded_model_classes[model_name] = getattr(module, _MODEL_REGISTRY[model_name]['class'])
+        else:
+            for name, cls in inspect.getmembers(module, inspect.isclass):
+                if cls.__module__ == module_name:
+                    _loaded_model_classes[model_name] = cls
+    return _loaded_model_classes[model_name]
+
+
+def get_model_family(model_name: str) -> str:
+    """
+    Get the family (i.e. parent class) of a model, without importing it if it is registered.
+
+    :param model_name: name of the model according to naming of .py file in package model
+
+    :return: family of the model: 'baseline' | 'sklearn' | 'stat' | 'tensorflow' | 'torch'
+    """
+    if model_name in _MODEL_REGISTRY:
+        return _MODEL_REGISTRY[model_name]['family']
+    for parent_class in get_model_class(model_name=model_name).__mro__:
+        if parent_class.__module__ in _FAMILY_MODULES:
+            return _FAMILY_MODULES[parent_class.__module__]
+    raise Exception('Model ' + model_name + ' is not based on one of the parent classes: ' +
+                    str(list(_FAMILY_MODULES.keys())))
+
+
+def get_model_resources(model_name: str) -> dict:
+    """
+    Get the resource demand of a model to schedule its study, see _FAMILY_RESOURCES for the meaning of the values.
+
+    :param model_name: name of the model according to naming of .py file in package model
+
+    :return: dictionary with cost, threads and memory_factor
+    """
+    resources = dict(_FAMILY_RESOURCES[get_model_family(model_name=model_name)])
+    resources.update(_MODEL_REGISTRY.get(model_name, {}).get('resources', {}))
+    return resources
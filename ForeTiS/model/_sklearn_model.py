@@ -39,7 +39,7 @@ class SklearnModel(_base_model.BaseModel, abc.ABC):
             x_train = self.x_scaler.fit_transform(x_train)
         if hasattr(self, 'standardize_y') and self.standardize_y:
             y_train = self.y_scaler.fit_transform(y_train.values.reshape(-1, 1))
-        self.model.fit(x_train, y_train)
+        self.fit_model(x_train=x_train, y_train=y_train)
         if hasattr(self, 'standardize_y') and self.standardize_y:
             y_train = self.y_scaler.inverse_transform(y_train)
 
@@ -55,6 +55,15 @@ class SklearnModel(_base_model.BaseModel, abc.ABC):
             y_pred = np.array([0])
         self.var_artifical = sklearn.metrics.mean_squared_error(y_true=y_true, y_pred=y_pred)
 
+    def fit_model(self, x_train, y_train):
+        """
+        Fit the sklearn-like model, can be overwritten by child classes, e.g. to continue a warm-started training
+
+        :param x_train: features of the training data
+        :param y_train: target of the training data
+        """
+        self.model.fit(x_train, y_train)
+
     def update(self, update: pd.DataFrame, period: int):
         """
         Implementation of the retraining for models with sklearn-like API.
@@ -5,6 +5,10 @@ import numpy as np
 import optuna
 import sklearn
 import tensorflow as tf
+from ..utils import helper_functions
+
+# tensorflow is only imported when the first tensorflow model is used, so it was not seeded before
+helper_functions.set_framework_seed(framework='tensorflow')
 
 
 class TensorflowModel(_base_model.BaseModel, abc.ABC):
@@ -110,6 +114,15 @@ class TensorflowModel(_base_model.BaseModel, abc.ABC):
             var = self.y_scaler.inverse_transform(var)
         return self.prediction.flatten(), self.var_artifical, var[:, 0]
 
+    def get_model_size_mb(self) -> float:
+        """
+        Size of the variables of the GPflow model and of the training data it predicts with.
+        See :obj:`~ForeTiS.model._base_model.BaseModel` for more information
+        """
+        n_bytes = sum(variable.numpy().nbytes for variable in self.model.variables)
+        n_bytes += sum(tensor.numpy().nbytes for tensor in self.model.data)
+        return n_bytes / 1024 ** 2
+
     def train_val_loop(self, train: pd.DataFrame, val: pd.DataFrame) -> np.array:
         """
         Implementation of a train and validation loop for models with sklearn-like API.
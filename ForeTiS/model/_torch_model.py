@@ -9,6 +9,10 @@ import sklearn
 from bayesian_torch.models.dnn_to_bnn import get_kl_loss
 
 from . import _base_model
+from ..utils import helper_functions
+
+# torch is only imported when the first torch model is used, so it was not seeded before
+helper_functions.set_framework_seed(framework='torch')
 
 
 class TorchModel(_base_model.BaseModel, abc.ABC):
@@ -33,6 +37,13 @@ class TorchModel(_base_model.BaseModel, abc.ABC):
         - early_stopping_point (*int*): epoch at which early stopping occured
         - device (*torch.device*): device to use, e.g. GPU
         - X_scaler (*sklearn.preprocessing.StandardScaler*): Standard scaler for the X data
+        - report_epochs (*bool*): whether to report the validation loss of each epoch to optuna for pruning
+
+        *Class attributes*
+
+        - pruning_epoch_budget (*int*): number of epochs every trial gets before it can be pruned with epoch-level
+          pruning, can be overwritten by child classes or by the pruning_epoch_budget of the optimization
+        - min_epochs (*int*): number of epochs before early stopping is possible if the training is not warm-started
 
     :param optuna_trial: Trial of optuna for optimization
     :param datasets: all datasets that are available
@@ -44,6 +55,10 @@ class TorchModel(_base_model.BaseModel, abc.ABC):
     :param num_monte_carlo: number of monte carlo iteration for the bayesian neural networks
     :param target_column: the target column for the prediction
     """
+    pruning_epoch_budget = 20
+    min_epochs = 20
+    supports_warm_start = True
+
     def __init__(self, optuna_trial: optuna.trial.Trial, datasets: list, featureset: str, test_set_size_percentage: int,
                  current_model_name: str = None, batch_size: int = None, n_epochs: int = None,
                  num_monte_carlo: int = None, target_column: str = None):
@@ -67,6 +82,7 @@ class TorchModel(_base_model.BaseModel, abc.ABC):
         self.early_stopping_point = None
         self.device = torch.device('cuda:0' if torch.cuda.is_available() else 'cpu')
         self.X_scaler = sklearn.preprocessing.StandardScaler()
+        self.report_epochs = False
 
     def train_val_loop(self, train: pd.DataFrame, val: pd.DataFrame) -> np.array:
         """
@@ -74,6 +90,10 @@ class TorchModel(_base_model.BaseModel, abc.ABC):
         See :obj:`~ForeTiS.model._base_model.BaseModel` for more information
         """
         self.prediction = None
+        # a warm-started network only has to adapt to the additional data of the fold
+        n_epochs = self.n_epochs if not self.warm_started else \
+            max(1, int(np.ceil(self.n_epochs * self.warm_start_budget_fraction)))
+        min_epochs = self.min_epochs if not self.warm_started else 0
         train_loader, val_loader, val = self.train_val_loader(train=train, val=val)
         best_model = copy.deepcopy(self.model)
         self.model.to(device=self.device)
@@ -84,7 +104,7 @@ class TorchModel(_base_model.BaseModel, abc.ABC):
         y_pred = np.array([0])
         self.var_artifical = sklearn.metrics.mean_squared_error(y_true=y_true, y_pred=y_pred)
 
-        for epoch in range(self.n_epochs):
+        for epoch in range(n_epochs):
             self.train_one_epoch(train_loader=train_loader)
             val_loss = self.validate_one_epoch(val_loader=val_loader)
             if best_loss is None or val_loss < best_loss:
@@ -93,13 +113,27 @@ class TorchModel(_base_model.BaseModel, abc.ABC):
                 best_model = copy.deepcopy(self.model)
             else:
                 epochs_wo_improvement += 1
-            if epoch >= 20 and epochs_wo_improvement >= self.early_stopping_patience:
-                print("Early Stopping at " + str(epoch + 1) + ' of ' + str(self.n_epochs))
+            if self.report_epochs:
+                # the number of epochs is the resource for multi-fidelity pruning
+                self.optuna_trial.report(value=val_loss, step=epoch)
+                if self.optuna_trial.should_prune():
+                    raise optuna.exceptions.TrialPruned('epoch ' + str(epoch + 1) + ' of ' + str(n_epochs))
+            if epoch >= min_epochs and epochs_wo_improvement >= self.early_stopping_patience:
+                print("Early Stopping at " + str(epoch + 1) + ' of ' + str(n_epochs))
                 self.early_stopping_point = epoch - self.early_stopping_patience
                 self.model = best_model
                 return self.predict(X_in=val)
         return self.predict(X_in=val)
 
+    def warm_start_from(self, previous_model):
+        """
+        Continue with the weights and the optimizer state of the network of the previous fold.
+        See :obj:`~ForeTiS.model._base_model.BaseModel` for more information.
+        """
+        super().warm_start_from(previous_model=previous_model)
+        self.model.load_state_dict(previous_model.model.state_dict())
+        self.optimizer.load_state_dict(previous_model.optimizer.state_dict())
+
     def train_val_loader(self, train: pd.DataFrame, val: pd.DataFrame):
         """
         Get the Dataloader with training and validation data
@@ -6,7 +6,7 @@ class AverageSeasonal(_baseline_model.BaselineModel):
 
     def define_model(self):
         """See BaseModel for more information"""
-        self.window = self.datasets.seasonal_periods
+        self.window = self.seasonal_periods
         return AverageSeasonal
 
     def define_hyperparams_to_tune(self) -> dict:
@@ -27,7 +27,7 @@ class AverageSeasonal(_baseline_model.BaselineModel):
         Implementation of the retraining for models with sklearn-like API.
         See BaseModel for more information
         """
-        observed_period = retrain.shift(self.datasets.seasonal_periods)
+        observed_period = retrain.shift(self.seasonal_periods)
         observed_period = observed_period.tail(self.window) if hasattr(self, 'window') else retrain
         self.average = observed_period[self.target_column].mean()
 
@@ -49,7 +49,7 @@ class AverageSeasonal(_baseline_model.BaselineModel):
         :param update: data for updating
         :param period: the current refit cycle
         """
-        observed_period = update.shift(self.datasets.seasonal_periods).tail(
+        observed_period = update.shift(self.seasonal_periods).tail(
             self.window) if hasattr(self, 'window') else update
         self.average = observed_period[self.target_column].mean()
 
@@ -8,6 +8,7 @@ from sklearn.gaussian_process.kernels import DotProduct, WhiteKernel, Matern, Ra
 
 class Gpr(_sklearn_model.SklearnModel):
     """See BaseModel for more information on the parameters"""
+    supports_warm_start = True
 
     def define_model(self) -> gaussian_process.GaussianProcessRegressor:
         """See BaseModel for more information"""
@@ -28,6 +29,14 @@ class Gpr(_sklearn_model.SklearnModel):
                                                          optimizer=optimizer, n_restarts_optimizer=n_restarts_optimizer,
                                                          copy_X_train=copy_X_train)
 
+    def warm_start_from(self, previous_model):
+        """
+        Start the optimization of the kernel hyperparameters at the optimum of the previous fold without restarts.
+        See BaseModel for more information.
+        """
+        super().warm_start_from(previous_model=previous_model)
+        self.model.set_params(kernel=previous_model.model.kernel_, n_restarts_optimizer=0)
+
     def define_hyperparams_to_tune(self) -> dict:
         """See BaseModel for more information on the format"""
         kernels, self.kernel_dict = self.extend_kernel_combinations()
@@ -5,6 +5,7 @@ from . import _sklearn_model
 
 class Lasso(_sklearn_model.SklearnModel):
     """See BaseModel for more information on the parameters"""
+    supports_warm_start = True
 
     def define_model(self) -> sklearn.linear_model.Lasso:
         """See BaseModel for more information"""
@@ -24,6 +25,15 @@ class Lasso(_sklearn_model.SklearnModel):
         params.update({'selection': 'cyclic'})
         return sklearn.linear_model.Lasso(alpha=alpha, **params)
 
+    def warm_start_from(self, previous_model):
+        """
+        Start the coordinate descent at the coefficients of the previous fold.
+        See BaseModel for more information.
+        """
+        super().warm_start_from(previous_model=previous_model)
+        self.model.set_params(warm_start=True)
+        self.model.coef_ = previous_model.model.coef_.copy()
+
     def define_hyperparams_to_tune(self) -> dict:
         """See BaseModel for more information on the format"""
         return {
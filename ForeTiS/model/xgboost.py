@@ -1,3 +1,4 @@
+import math
 import xgboost
 
 from . import _sklearn_model
@@ -9,6 +10,7 @@ class XgBoost(_sklearn_model.SklearnModel):
 
     See :obj:`~ForeTiS.model._base_model.BaseModel` for more information on the attributes.
     """
+    supports_warm_start = True
 
     def define_model(self) -> xgboost.XGBModel:
         """
@@ -24,6 +26,25 @@ class XgBoost(_sklearn_model.SklearnModel):
         params.update({'tree_method': 'auto'})
         return xgboost.XGBRegressor(**params)
 
+    def warm_start_from(self, previous_model):
+        """
+        Continue boosting from the trees of the previous fold, only a fraction of n_estimators is added.
+        See :obj:`~ForeTiS.model._base_model.BaseModel` for more information.
+        """
+        super().warm_start_from(previous_model=previous_model)
+        self.warm_start_booster = previous_model.model.get_booster()
+        self.model.set_params(
+            n_estimators=max(1, math.ceil(self.model.get_params()['n_estimators'] * self.warm_start_budget_fraction)))
+
+    def fit_model(self, x_train, y_train):
+        """
+        See :obj:`~ForeTiS.model._sklearn_model.SklearnModel` for more information.
+        """
+        if self.warm_started:
+            self.model.fit(x_train, y_train, xgb_model=self.warm_start_booster)
+        else:
+            self.model.fit(x_train, y_train)
+
 
     def define_hyperparams_to_tune(self) -> dict:
         """
@@ -1,9 +1,10 @@
 import pprint
+import functools
 import configparser
 
-from ForeTiS.utils import helper_functions
+from ForeTiS.utils import helper_functions, check_functions
 from ForeTiS.preprocess import base_dataset
-from ForeTiS.optimization import optuna_optim
+from ForeTiS.optimization import optuna_optim, study_scheduler, model_racing
 
 
 def run(data_dir: str, save_dir: str = None, featuresets: list = None, datasplit: str = 'timeseries-cv',
@@ -13,12 +14,20 @@ def run(data_dir: str, save_dir: str = None, featuresets: list = None, datasplit
         correlation_number: int = None, models: list = None, data: str = None, target_column: str = None,
         n_trials: int = 100, save_final_model: bool = False, periodical_refit_cycles: list = None,
         refit_drops: int = 0, refit_window: int = 5, intermediate_results_interval: int = None, batch_size: int = 32,
-        n_epochs: int = None, num_monte_carlo: int = None):
+        n_epochs: int = None, num_monte_carlo: int = None, n_jobs: int = 1, fold_jobs: int = 1,
+        pruner: str = 'percentile', pruning_epoch_budget: int = None, warm_start_studies: list = None,
+        warm_start_top_k: int = 10, warm_start_mode: str = 'enqueue', study_jobs: int = 1,
+        max_memory_gb: float = None, export_validation_csv: bool = True, study_timeout: int = None,
+        trial_timeout: int = None, resume: bool = False, incremental_folds: bool = False, multi_objective: bool = False,
+        max_latency_ms: float = None, low_fidelity_seasons: int = None, use_trial_cache: bool = False,
+        trial_memory_limit_mb: float = None, trials_per_worker: int = None, racing: bool = False,
+        racing_eta: int = 3):
 
     # Optimization Pipeline #
     helper_functions.set_all_seeds()
     models_to_optimize = helper_functions.get_list_of_implemented_models() if models == ['all'] else models
-    featureset_overview = {}
+    # check the arguments before the dataset is loaded and any study is built
+    check_functions.check_all_specified_arguments(arguments={**locals(), 'models': models_to_optimize})
     model_featureset_overview = {}
     config = configparser.ConfigParser()
     config.read('Config/dataset_specific_config.ini')
@@ -30,28 +39,89 @@ def run(data_dir: str, save_dir: str = None, featuresets: list = None, datasplit
                                     imputation_method=imputation_method, correlation_method=correlation_method,
                                     correlation_number=correlation_number, config=config)
     print('### Dataset is loaded ###')
-    for current_model_name in models_to_optimize:
-        for featureset in featuresets:
-            optuna_run = optuna_optim.OptunaOptim(save_dir=save_dir, data=data, featureset=featureset,
-                                                  datasplit=datasplit,
-                                                  test_set_size_percentage=test_set_size_percentage,
-                                                  val_set_size_percentage=val_set_size_percentage, n_splits=n_splits,
-                                                  models=models, target_column=target_column, n_trials=n_trials,
-                                                  save_final_model=save_final_model,
-                                                  periodical_refit_cycles=periodical_refit_cycles,
-                                                  refit_drops=refit_drops, refit_window=refit_window,
-                                                  intermediate_results_interval=intermediate_results_interval,
-                                                  batch_size=batch_size, n_epochs=n_epochs,
-                                                  num_monte_carlo=num_monte_carlo,
-                                                  current_model_name=current_model_name, datasets=datasets,
-                                                  config=config)
-            print('### Starting Optuna Optimization for model ' + current_model_name + ' and featureset ' + featureset
-                  + ' ###')
-            overall_results = optuna_run.run_optuna_optimization
-            print('### Finished Optuna Optimization for ' + current_model_name + ' and featureset ' + featureset
-                  + ' ###')
-            featureset_overview[featureset] = overall_results
-            model_featureset_overview[current_model_name] = featureset_overview
+    optuna_params = {'save_dir': save_dir, 'data': data, 'datasplit': datasplit,
+                     'test_set_size_percentage': test_set_size_percentage,
+                     'val_set_size_percentage': val_set_size_percentage, 'n_splits': n_splits, 'models': models,
+                     'target_column': target_column, 'n_trials': n_trials, 'save_final_model': save_final_model,
+                     'periodical_refit_cycles': periodical_refit_cycles, 'refit_drops': refit_drops,
+                     'refit_window': refit_window, 'intermediate_results_interval': intermediate_results_interval,
+                     'batch_size': batch_size, 'n_epochs': n_epochs, 'num_monte_carlo': num_monte_carlo,
+                     'n_jobs': n_jobs, 'fold_jobs': fold_jobs, 'pruner': pruner,
+                     'pruning_epoch_budget': pruning_epoch_budget,
+                     'warm_start_studies': warm_start_studies, 'warm_start_top_k': warm_start_top_k,
+                     'warm_start_mode': warm_start_mode, 'export_validation_csv': export_validation_csv,
+                     'study_timeout': study_timeout, 'trial_timeout': trial_timeout, 'resume': resume,
+                     'incremental_folds': incremental_folds, 'multi_objective': multi_objective,
+                     'max_latency_ms': max_latency_ms, 'low_fidelity_seasons': low_fidelity_seasons,
+                     'use_trial_cache': use_trial_cache, 'trial_memory_limit_mb': trial_memory_limit_mb,
+                     'trials_per_worker': trials_per_worker}
+    if study_jobs > 1 or n_jobs > 1 or fold_jobs > 1 or study_timeout is not None or trial_timeout is not None \
+            or trial_memory_limit_mb is not None or intermediate_results_interval is not None or racing:
+        # worker processes, e.g. the background worker generating the intermediate results, attach to the
+        # featuresets instead of getting a copy each
+        datasets.share_memory()
+    try:
+        if racing:
+            # the studies are only set up by the race before their first trial
+            optuna_runs = {current_model_name: {featureset: optuna_optim.OptunaOptim(
+                featureset=featureset, current_model_name=current_model_name, datasets=datasets, config=config,
+                **optuna_params) for featureset in featuresets} for current_model_name in models_to_optimize}
+            print('### Racing the studies of ' + str(models_to_optimize) + ' and ' + str(featuresets) + ' ###')
+            model_featureset_overview = model_racing.run_racing(optuna_runs=optuna_runs, n_trials=n_trials,
+                                                                eta=racing_eta)
+        elif study_jobs > 1:
+            # run the studies concurrently, the longest first
+            featureset_sizes_mb = {featureset: get_featureset_size_mb(datasets=datasets, featureset=featureset)
+                                   for featureset in featuresets}
+            jobs = study_scheduler.get_study_jobs(models=models_to_optimize, featuresets=featuresets,
+                                                  featureset_sizes_mb=featureset_sizes_mb, n_jobs=n_jobs,
+                                                  fold_jobs=fold_jobs)
+            print('### Scheduling ' + str(len(jobs)) + ' studies on ' + str(study_jobs) + ' cores ###')
+            model_featureset_overview = study_scheduler.run_study_jobs(
+                jobs=jobs, run_job=functools.partial(run_study, datasets=datasets, config=config,
+                                                     optuna_params=optuna_params),
+                n_cores=study_jobs, max_memory_gb=max_memory_gb)
+        else:
+            for current_model_name in models_to_optimize:
+                for featureset in featuresets:
+                    model_featureset_overview.setdefault(current_model_name, {})[featureset] = run_study(
+                        model_name=current_model_name, featureset=featureset, datasets=datasets, config=config,
+                        optuna_params=optuna_params)
+    finally:
+        datasets.release_shared_memory()
     print('# Optimization runs done for models ' + str(models_to_optimize) + ' and ' + str(featuresets))
     print('Results overview on the test set(s)')
     pprint.PrettyPrinter(depth=5).pprint(model_featureset_overview)
+
+
+def run_study(model_name: str, featureset: str, datasets: base_dataset.Dataset, config: configparser.ConfigParser,
+              optuna_params: dict) -> dict:
+    """
+    Run the optuna optimization of one model on one featureset.
+    Module-level function, so that the studies can also be run in worker processes.
+    :param model_name: name of the model to optimize
+    :param featureset: featureset to optimize the model on
+    :param datasets: preprocessed datasets
+    :param config: the information from dataset_specific_config.ini
+    :param optuna_params: further params handed over to OptunaOptim
+    :return: overall results of the optimization
+    """
+    helper_functions.set_all_seeds()
+    optuna_run = optuna_optim.OptunaOptim(featureset=featureset, current_model_name=model_name, datasets=datasets,
+                                          config=config, **optuna_params)
+    print('### Starting Optuna Optimization for model ' + model_name + ' and featureset ' + featureset + ' ###')
+    overall_results = optuna_run.run_optuna_optimization
+    print('### Finished Optuna Optimization for ' + model_name + ' and featureset ' + featureset + ' ###')
+    return overall_results
+
+
+def get_featureset_size_mb(datasets: base_dataset.Dataset, featureset: str) -> float:
+    """
+    Get the size of a featureset in memory, for 'optimize' the size of the largest featureset
+    :param datasets: preprocessed datasets
+    :param featureset: name of the featureset
+    :return: size in MB
+    """
+    sizes = [dataset.memory_usage(deep=True).sum() / 1024 ** 2 for dataset in datasets.datasets
+             if featureset == 'optimize' or dataset.name == featureset]
+    return max(sizes) if len(sizes) > 0 else 0
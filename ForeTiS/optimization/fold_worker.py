@@ -0,0 +1,112 @@
+import time
+import multiprocessing
+
+from ..utils import memory_monitor
+
+# interval in seconds to check the memory of a worker while waiting for its result
+_MEMORY_POLL_INTERVAL = 0.5
+
+
+class FoldWorker:
+    """
+    Persistent worker process evaluating folds one after another.
+    In contrast to a process pool, the worker can be terminated while evaluating a fold, e.g. if a trial exceeds its
+    time budget or its memory limit. A terminated worker is restarted on its next use.
+
+    ** Attributes **
+
+        - process (*multiprocessing.Process*): the worker process, None if not started
+        - connection (*multiprocessing.connection.Connection*): connection to send tasks and receive results
+        - busy (*bool*): whether the worker evaluates a task whose result was not received yet
+        - failure (*str*): reason why no result was received for the last task: 'timeout' | 'memory' | 'died',
+          None if the result was received
+        - failure_rss_mb (*float*): RSS of the worker in MB when it was terminated for exceeding the memory limit
+    """
+    def __init__(self):
+        self.process = None
+        self.connection = None
+        self.busy = False
+        self.failure = None
+        self.failure_rss_mb = None
+
+    def start(self):
+        """
+        Start the worker process
+        """
+        mp_context = multiprocessing.get_context('spawn')
+        self.connection, worker_connection = mp_context.Pipe()
+        self.process = mp_context.Process(target=_serve_tasks, args=(worker_connection,), daemon=True)
+        self.process.start()
+        worker_connection.close()
+
+    def submit(self, function, **kwargs):
+        """
+        Send a task to the worker, the worker is started if it is not running
+        :param function: module-level function to call in the worker
+        :param kwargs: keyword arguments of the function
+        """
+        if self.process is None or not self.process.is_alive():
+            self.terminate()
+            self.start()
+        self.connection.send((function, kwargs))
+        self.busy = True
+
+    def receive(self, deadline: float = None, memory_limit_mb: float = None):
+        """
+        Wait for the result of the submitted task. The worker is terminated if the deadline or the memory limit is
+        exceeded, the reason is kept in failure.
+        :param deadline: latest time (as time.time()) to wait for the result, no limit if None
+        :param memory_limit_mb: maximal RSS of the worker in MB, no limit if None
+        :return: result of the task, None if the deadline or the memory limit was exceeded or the worker died
+        """
+        self.failure = None
+        self.failure_rss_mb = None
+        try:
+            while True:
+                timeout = None if deadline is None else max(deadline - time.time(), 0)
+                if memory_limit_mb is not None:
+                    timeout = _MEMORY_POLL_INTERVAL if timeout is None else min(timeout, _MEMORY_POLL_INTERVAL)
+                if self.connection.poll(timeout):
+                    break
+                rss_mb = None if memory_limit_mb is None else memory_monitor.get_rss_mb(pid=self.process.pid)
+                if rss_mb is not None and rss_mb > memory_limit_mb:
+                    self.failure, self.failure_rss_mb = 'memory', rss_mb
+                    self.terminate()
+                    return None
+                if deadline is not None and time.time() >= deadline:
+                    self.failure = 'timeout'
+                    self.terminate()
+                    return None
+            result = self.connection.recv()
+        except EOFError:
+            # worker process died, e.g. killed by the operating system
+            self.failure = 'died'
+            self.terminate()
+            return None
+        self.busy = False
+        return result
+
+    def terminate(self):
+        """
+        Terminate the worker process, running tasks are aborted
+        """
+        if self.process is not None:
+            self.process.terminate()
+            self.process.join()
+            self.connection.close()
+        self.process = None
+        self.connection = None
+        self.busy = False
+
+
+def _serve_tasks(connection):
+    """
+    Loop of the worker process: evaluate the received tasks until the connection is closed
+    :param connection: connection to receive tasks and send results
+    """
+    while True:
+        try:
+            function, kwargs = connection.recv()
+        except EOFError:
+            return
+        connection.send(function(**kwargs))
@@ -0,0 +1,126 @@
+import math
+import time
+
+from ..model import _model_registry
+
+
+def get_n_rungs(n_candidates: int, eta: int) -> int:
+    """
+    Get the number of rungs of the race, after the last rung a single candidate is left
+    :param n_candidates: number of candidates at the start of the race
+    :param eta: reduction factor of the successive halving
+    :return: number of rungs
+    """
+    n_rungs = 1
+    while n_candidates > 1:
+        n_candidates = math.ceil(n_candidates / eta)
+        n_rungs += 1
+    return n_rungs
+
+
+def get_candidate_score(optuna_run) -> float:
+    """
+    Get the score of a candidate: the best validation result of its study
+    :param optuna_run: OptunaOptim instance of the candidate
+    :return: best validation result, infinity if no trial completed yet
+    """
+    if optuna_run.study is None or len(optuna_run.get_completed_trials()) == 0:
+        return math.inf
+    return optuna_run.get_best_trial().values[0]
+
+
+def run_rung(candidates: list, n_trials_per_candidate: int) -> int:
+    """
+    Run the trials of a rung, interleaved across the candidates: each candidate runs a step of trials in turn,
+    so that all candidates advance together instead of one study after another.
+    The studies are only set up before their first trial, so that their time budget does not start earlier.
+    While a candidate runs, the time budgets of the other candidates are paused.
+    :param candidates: OptunaOptim instances of the candidates
+    :param n_trials_per_candidate: number of trials each candidate runs in this rung
+    :return: number of trials run in this rung
+    """
+    targets = {}
+    for optuna_run in candidates:
+        if optuna_run.study is None:
+            optuna_run.setup_study()
+        targets[optuna_run] = optuna_run.get_n_counted_trials() + n_trials_per_candidate
+    n_rung_trials = 0
+    running = list(candidates)
+    while len(running) > 0:
+        for optuna_run in list(running):
+            n_counted_trials = optuna_run.get_n_counted_trials()
+            if n_counted_trials >= targets[optuna_run] or optuna_run.is_time_budget_exhausted():
+                running.remove(optuna_run)
+                continue
+            # a step of n_jobs trials, so that the trials of a candidate can still run in parallel
+            step = min(optuna_run.user_input_params["n_jobs"], targets[optuna_run] - n_counted_trials)
+            start_time = time.time()
+            optuna_run.optimize(n_trials=n_counted_trials + step)
+            step_duration = time.time() - start_time
+            for other_run in candidates:
+                if other_run is not optuna_run and other_run.study_deadline is not None:
+                    other_run.study_deadline += step_duration
+            n_step_trials = optuna_run.get_n_counted_trials() - n_counted_trials
+            n_rung_trials += n_step_trials
+            if n_step_trials <= 0:
+                # no progress, e.g. as the time budget of the study is exhausted
+                running.remove(optuna_run)
+    return n_rung_trials
+
+
+def run_racing(optuna_runs: dict, n_trials: int, eta: int = 3) -> dict:
+    """
+    Race the studies of all models and featuresets against each other with successive halving instead of running
+    n_trials trials for each of them. The total budget are n_trials trials per study.
+    The budget is split evenly across the rungs, and the budget of a rung evenly across the remaining candidates,
+    whose trials are interleaved. After each rung, the candidates are ranked by their best validation result and
+    only the best 1/eta continue. The budget left by eliminated candidates is given to the remaining ones,
+    so the last candidate gets all trials not used before.
+    All studies are finished with their best trial so far, so that test results exist for every candidate.
+    :param optuna_runs: OptunaOptim instances by model and featureset, their studies are set up by the race
+    :param n_trials: number of trials per study of the total budget
+    :param eta: reduction factor of the successive halving
+    :return: overall results by model and featureset
+    """
+    candidates = {(model_name, featureset): optuna_run for model_name, featureset_runs in optuna_runs.items()
+                  for featureset, optuna_run in featureset_runs.items()}
+    remaining_candidates = sorted(candidates.keys())
+    eliminated_at_rung = {}
+    remaining_budget = n_trials * len(candidates)
+    n_rungs = get_n_rungs(n_candidates=len(candidates), eta=eta)
+    for rung in range(n_rungs):
+        n_trials_per_candidate = max(1, (remaining_budget // (n_rungs - rung)) // len(remaining_candidates))
+        if rung == n_rungs - 1:
+            n_trials_per_candidate = max(1, remaining_budget // len(remaining_candidates))
+        print('### Racing rung ' + str(rung) + ': ' + str(n_trials_per_candidate) + ' trials for each of ' +
+              str(remaining_candidates) + ' ###')
+        remaining_budget -= run_rung(candidates=[candidates[candidate] for candidate in remaining_candidates],
+                                     n_trials_per_candidate=n_trials_per_candidate)
+        # the worker processes are not needed until the next rung
+        for candidate in remaining_candidates:
+            candidates[candidate].shutdown_fold_workers()
+        if rung == n_rungs - 1:
+            break
+        scores = {candidate: get_candidate_score(optuna_run=candidates[candidate])
+                  for candidate in remaining_candidates}
+        print('Best validation results of the candidates: ' + str(scores))
+        ranked_candidates = sorted(remaining_candidates, key=lambda candidate: scores[candidate])
+        n_promoted = max(1, math.ceil(len(remaining_candidates) / eta))
+        for candidate in ranked_candidates[n_promoted:]:
+            eliminated_at_rung[candidate] = rung
+        remaining_candidates = sorted(ranked_candidates[:n_promoted])
+    print('### Racing finished, winning candidates: ' + str(remaining_candidates) + ' ###')
+
+    overall_results = {}
+    for (model_name, featureset), optuna_run in candidates.items():
+        racing_info = {'family': _model_registry.get_model_family(model_name=model_name),
+                       'eliminated_at_rung': eliminated_at_rung.get((model_name, featureset)),
+                       'n_trials': 0 if optuna_run.study is None else optuna_run.get_n_counted_trials()}
+        if optuna_run.study is None or len(optuna_run.get_completed_trials()) == 0:
+            print('No trial of model ' + model_name + ' and featureset ' + featureset + ' completed')
+            overall_results.setdefault(model_name, {})[featureset] = {'Racing': racing_info}
+            continue
+        results = optuna_run.finalize()
+        results['Racing'] = racing_info
+        overall_results.setdefault(model_name, {})[featureset] = results
+    return overall_results
@@ -6,17 +6,20 @@ import numpy as np
 import os
 import glob
 import shutil
-from sklearn.model_selection import train_test_split
 import csv
 import time
 import traceback
 import copy
 import configparser
+import re
+import multiprocessing
+import concurrent.futures
 
 from ..preprocess import base_dataset
-from ..utils import helper_functions
+from ..utils import helper_functions, split_plan, phase_timer, memory_monitor
+from . import fold_worker, trial_cache
 from ..evaluation import eval_metrics
-from ..model import _base_model, _model_functions, _torch_model
+from ..model import _base_model, _model_functions, _model_registry
 
 
 class OptunaOptim:
@@ -31,6 +34,16 @@ class OptunaOptim:
         - save_path (*str*): path for model and results storing
         - study (*optuna.study.Study*): optuna study for optimization run
         - current_best_val_result (*float*): the best validation result so far
+        - trial_memo (*dict*): validation results and trial numbers of completed trials by their params
+        - pruned_params (*set*): params of trials that were pruned by the pruner
+        - memo_refreshed_until (*int*): number of the first trial that was unfinished at the last refresh of the memo
+        - n_transferred_trials (*int*): number of trials transferred from previous runs into the study
+        - phase_timer (*PhaseTimer*): timer of the phases of the current trial
+        - intermediate_executor (*ProcessPoolExecutor*): background worker generating the intermediate results
+        - intermediate_futures (*dict*): pending intermediate results by the filename of their model snapshot
+        - fold_workers (*list<FoldWorker>*): worker processes evaluating the folds if the trials have a time budget
+        - study_deadline (*float*): time (as time.time()) at which the time budget of the study is exhausted
+        - resume_path (*str*): results directory of the interrupted run to resume, None for a new run
         - early_stopping_point (*int*): point at which early stopping occured (relevant for some models)
         - target_column (*str*): target column for which predictions shall be made
         - user_input_params (*dict*): all params handed over to the constructor that are needed in the whole class
@@ -47,22 +60,79 @@ class OptunaOptim:
     :param refit_drops: after how many periods the model should get updated
     :param target_column: target column for which predictions shall be made
     :param intermediate_results_interval: number of trials after which intermediate results will be saved
+    :param n_jobs: number of worker processes running trials of the study in parallel
+    :param fold_jobs: number of worker processes evaluating the folds of a trial in parallel
+    :param pruner: pruning strategy: 'percentile' (based on the folds) or 'hyperband' (based on the epochs of the first
+        fold for PyTorch models, otherwise on the folds)
+    :param pruning_epoch_budget: only relevant for hyperband: number of epochs every trial of a PyTorch model gets
+        before it can be pruned, the budget of the model class is used if None
+    :param warm_start_studies: paths of optuna databases of previous runs to warm-start the new study with
+    :param warm_start_top_k: number of best configurations of the previous runs to enqueue
+    :param warm_start_mode: how to use the previous runs: 'enqueue' (rerun the top-k configurations first),
+        'transfer' (add all completed trials to the history of the sampler) or 'both'
+    :param export_validation_csv: whether to additionally export the validation results of the best trial as CSV
+    :param study_timeout: time budget of the study in seconds, trials still running at its end are stopped
+    :param trial_timeout: time budget of the evaluation of the folds of a trial in seconds
+    :param resume: whether to resume the latest interrupted run of the model and featureset in save_dir
+    :param incremental_folds: whether to start the training on each expanding timeseries-cv fold from the model
+        fitted on the previous fold, only for models supporting warm starts
+    :param multi_objective: whether to minimize the per-row prediction latency along with the validation result,
+        the final model is then selected from the Pareto front
+    :param max_latency_ms: only relevant for multi_objective: maximal per-row prediction latency in milliseconds of
+        the final model, the most accurate trial of the Pareto front below it is selected
+    :param low_fidelity_seasons: number of most recent seasons a trial is trained on in a low-fidelity stage before
+        the full folds, the trial is only evaluated on the full folds if it is not pruned after this stage
+    :param use_trial_cache: whether to reuse the results of folds already evaluated in any previous run with the same
+        save_dir and to store the new ones, see :obj:`~ForeTiS.optimization.trial_cache.TrialCache`
+    :param trial_memory_limit_mb: maximal RSS in MB of a worker process evaluating a fold, trials exceeding it are
+        stopped and treated as pruned
+    :param trials_per_worker: number of trials after which the worker processes evaluating the folds are restarted
+        to release memory that is never freed by the model libraries, the workers are kept if None
     """
 
     def __init__(self, save_dir: str, data: str, featureset: str, datasplit: str, test_set_size_percentage: int,
                  val_set_size_percentage: int, n_splits: int, models: list, n_trials: int, save_final_model: bool,
                  batch_size: int, n_epochs: int, num_monte_carlo: int, current_model_name: str,
                  datasets: base_dataset.Dataset, periodical_refit_cycles: list, refit_drops: int, refit_window: int,
-                 target_column: str, intermediate_results_interval: int = 50, config: configparser.ConfigParser = None):
+                 target_column: str, intermediate_results_interval: int = 50, config: configparser.ConfigParser = None,
+                 n_jobs: int = 1, fold_jobs: int = 1, pruner: str = 'percentile', pruning_epoch_budget: int = None,
+                 warm_start_studies: list = None, warm_start_top_k: int = 10, warm_start_mode: str = 'enqueue',
+                 export_validation_csv: bool = True, study_timeout: int = None, trial_timeout: int = None,
+                 resume: bool = False, incremental_folds: bool = False, multi_objective: bool = False,
+                 max_latency_ms: float = None, low_fidelity_seasons: int = None, use_trial_cache: bool = False,
+                 trial_memory_limit_mb: float = None, trials_per_worker: int = None):
         self.current_model_name = current_model_name
         self.datasets = datasets
-        self.base_path = save_dir + '/results/' + current_model_name + '/' + \
-                         datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S") + '/'
+        self.featureset = featureset
+        self.resume_path = self.find_resumable_run(save_dir=save_dir) if resume else None
+        if self.resume_path is not None:
+            self.base_path = self.resume_path
+        else:
+            self.base_path = save_dir + '/results/' + current_model_name + '/' + \
+                             datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S") + '/'
+            if os.path.exists(self.base_path):
+                # studies of the same model on several featuresets might be started at once
+                self.base_path = self.base_path[:-1] + '_' + featureset + '/'
         if not os.path.exists(self.base_path):
             os.makedirs(self.base_path)
-        self.featureset = featureset
         self.save_path = self.base_path
         self.study = None
+        self.study_name = None
+        self.fold_executor = None
+        self.fold_workers = []
+        self.n_fold_worker_trials = 0
+        self.study_deadline = None
+        self.trial_memo = {}
+        self.pruned_params = set()
+        self.memo_refreshed_until = 0
+        self.split_plan_stored = False
+        self.n_transferred_trials = 0
+        self.n_trials = n_trials
+        self.trial_cache = trial_cache.TrialCache(cache_dir=save_dir + '/trial_cache/') if use_trial_cache else None
+        self.dataset_fingerprints = {}
+        self.phase_timer = None
+        self.intermediate_executor = None
+        self.intermediate_futures = {}
         self.current_best_val_result = None
         self.early_stopping_point = None
         self.target_column = target_column
@@ -72,229 +142,886 @@ class OptunaOptim:
         self.seasonal_periods = config[data].getint('seasonal_periods')
         self.user_input_params = locals()  # distribute all handed over params in whole class
 
+    def __getstate__(self) -> dict:
+        """
+        Drop the study when pickling, e.g. for worker processes, as they reconnect to the storage on their own.
+        The dataset is dropped as well, it is set from the model of each trial.
+        """
+        state = self.__dict__.copy()
+        state['study'] = None
+        state['dataset'] = None
+        state['fold_executor'] = None
+        state['fold_workers'] = []
+        state['intermediate_executor'] = None
+        state['intermediate_futures'] = {}
+        return state
+
     def create_new_study(self) -> optuna.study.Study:
         """
         Method to create a new optuna study
         :return: optuna study
         """
-        study_name = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S") + '_' + '-MODEL' + self.current_model_name\
-                     + '-TRIALS' + str(self.user_input_params["n_trials"])
-        storage = optuna.storages.RDBStorage(
-            "sqlite:///" + self.save_path + 'Optuna_DB-' + study_name + ".db", heartbeat_interval=60, grace_period=120,
-            failed_trial_callback=optuna.storages.RetryFailedTrialCallback(max_retry=3)
-        )
+        self.study_name = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S") + '_' + '-MODEL' + \
+            self.current_model_name + '-TRIALS' + str(self.user_input_params["n_trials"])
         study = optuna.create_study(
-            storage=storage, study_name=study_name, direction='minimize', load_if_exists=True,
-            sampler=optuna.samplers.TPESampler(seed=42),
-            pruner=optuna.pruners.PercentilePruner(percentile=80, n_min_trials=20)
+            storage=self.get_storage(), study_name=self.study_name, load_if_exists=True,
+            # validation result and, for multi-objective studies, per-row prediction latency
+            directions=['minimize', 'minimize'] if self.user_input_params["multi_objective"] else ['minimize'],
+            sampler=self.get_sampler(seed=42), pruner=self.get_pruner()
         )
+        # to find the run again if it has to be resumed
+        study.set_user_attr('featureset', self.featureset)
+        if self.user_input_params["warm_start_studies"] is not None:
+            self.warm_start_study(study=study)
 
         return study
 
+    def find_resumable_run(self, save_dir: str) -> str:
+        """
+        Find the latest run of the model and featureset that was interrupted, i.e. that has a study database,
+        but no final results
+        :param save_dir: directory the results are saved in
+        :return: results directory of the run, None if there is no interrupted run
+        """
+        model_dir = save_dir + '/results/' + self.current_model_name + '/'
+        if not os.path.exists(model_dir):
+            return None
+        # the directories are named by their start time
+        for run_dir in sorted(os.listdir(model_dir), reverse=True):
+            run_path = model_dir + run_dir + '/'
+            db_files = glob.glob(run_path + 'Optuna_DB-*.db')
+            if len(db_files) == 0 or os.path.exists(run_path + 'final_model_test_results.csv'):
+                continue
+            study_summaries = optuna.get_all_study_summaries(storage='sqlite:///' + db_files[0])
+            # studies of older runs do not store their featureset
+            if len(study_summaries) > 0 and \
+                    study_summaries[0].user_attrs.get('featureset', self.featureset) == self.featureset:
+                return run_path
+        print('No interrupted run of ' + self.current_model_name + ' on featureset ' + self.featureset +
+              ' found in ' + model_dir + ', starting a new run')
+        return None
+
+    def resume_study(self) -> optuna.study.Study:
+        """
+        Reattach to the study of an interrupted run and restore the state of the optimization: the memo of the
+        evaluated params, the best validation result and the files of the best trial.
+        Trials that were running when the run was interrupted are failed right away instead of waiting for the
+        heartbeat of the storage, as no process of the interrupted run is left, and retried.
+        :return: optuna study
+        """
+        db_file = glob.glob(self.save_path + 'Optuna_DB-*.db')[0]
+        self.study_name = os.path.basename(db_file)[len('Optuna_DB-'):-len('.db')]
+        storage = self.get_storage()
+        self.study = optuna.load_study(study_name=self.study_name, storage=storage,
+                                       sampler=self.get_sampler(seed=42), pruner=self.get_pruner())
+        stale_trials = self.study.get_trials(deepcopy=False, states=(optuna.trial.TrialState.RUNNING,))
+        for stale_trial in stale_trials:
+            storage.set_trial_state_values(trial_id=stale_trial._trial_id, state=optuna.trial.TrialState.FAIL)
+            # enqueues the params of the trial again, like for trials failed by the heartbeat
+            storage.failed_trial_callback(self.study, stale_trial)
+        if len(stale_trials) > 0:
+            print('Failed ' + str(len(stale_trials)) + ' trials still running when the run was interrupted')
+        trials = self.study.get_trials(deepcopy=False)
+        self.n_transferred_trials = len([trial for trial in trials if 'warm_start_source' in trial.user_attrs])
+        for trial in trials:
+            self.memoize_finished_trial(finished_trial=trial)
+        print('Resuming study ' + self.study_name + ' with ' + str(len(trials) - self.n_transferred_trials) +
+              ' trials of the interrupted run')
+        self.current_best_val_result = None
+        if len(self.get_completed_trials()) > 0:
+            best_trial = self.get_best_trial()
+            self.current_best_val_result = best_trial.values[0]
+            self.restore_best_trial_files(best_trial=best_trial)
+        return self.study
+
+    def restore_best_trial_files(self, best_trial: optuna.trial.FrozenTrial):
+        """
+        Restore the files of the best trial of an interrupted run in the temp directory.
+        They are copied back if the run was interrupted during the final evaluation. If they are missing,
+        the unfitted model is rebuilt from the params of the trial, only its validation results are lost then.
+        :param best_trial: best trial of the interrupted run
+        """
+        os.makedirs(self.save_path + 'temp/', exist_ok=True)
+        model_filename = 'unfitted_model_trial' + str(best_trial.number)
+        for filename in [model_filename, 'validation_results_trial' + str(best_trial.number) + '.npz']:
+            if not os.path.exists(self.save_path + 'temp/' + filename) and \
+                    os.path.exists(self.save_path + filename):
+                shutil.copyfile(self.save_path + filename, self.save_path + 'temp/' + filename)
+        if not os.path.exists(self.save_path + 'temp/' + model_filename):
+            print('Files of the best trial ' + str(best_trial.number) + ' not found, rebuilding its unfitted model')
+            model = self.create_model(
+                optuna_trial=optuna.trial.FixedTrial(params=best_trial.params, number=best_trial.number))
+            model.save_model(path=self.save_path + 'temp/', filename=model_filename)
+
+    @staticmethod
+    def get_counted_trial_states() -> tuple:
+        """
+        Get the states of the trials counting towards the specified number of trials, i.e. the finished ones.
+        Failed trials do not count, as trials failed because the run was interrupted are retried.
+        :return: tuple of trial states
+        """
+        return optuna.trial.TrialState.COMPLETE, optuna.trial.TrialState.PRUNED
+
+    def get_max_trials_callback(self) -> optuna.study.MaxTrialsCallback:
+        """
+        Get the callback stopping the optimization once the specified number of trials of this run exist.
+        Trials transferred from previous runs are part of the study, but do not count.
+        :return: callback for study.optimize()
+        """
+        return optuna.study.MaxTrialsCallback(n_trials=self.n_trials + self.n_transferred_trials,
+                                              states=self.get_counted_trial_states())
+
+    def get_n_counted_trials(self) -> int:
+        """
+        Get the number of trials of this run counting towards the specified number of trials
+        :return: number of counted trials
+        """
+        n_counted_trials = len(self.study.get_trials(deepcopy=False, states=self.get_counted_trial_states()))
+        return n_counted_trials - self.n_transferred_trials
+
+    def get_n_remaining_trials(self) -> int:
+        """
+        Get the number of trials to run until the specified number of trials of this run exist
+        :return: number of remaining trials
+        """
+        return max(self.n_trials - self.get_n_counted_trials(), 0)
+
+    def is_time_budget_exhausted(self) -> bool:
+        """
+        Check if the time budget of the study is exhausted, i.e. no further trials are started
+        :return: bool reflecting if the time budget is exhausted
+        """
+        return self.study_deadline is not None and time.time() >= self.study_deadline
+
+    def create_model(self, optuna_trial: optuna.trial.BaseTrial) -> _base_model.BaseModel:
+        """
+        Create the unfitted model with the params suggested by a trial
+        :param optuna_trial: trial of optuna suggesting the params
+        :return: unfitted model
+        """
+        # in case a model has attributes not part of the base class hand them over in a dictionary to keep the same call
+        # (name of the attribute and key in the dictionary have to match)
+        additional_attributes_dict = {}
+        if _model_registry.get_model_family(model_name=self.current_model_name) == 'torch':
+            # additional attributes for torch models
+            additional_attributes_dict['batch_size'] = self.user_input_params["batch_size"]
+            additional_attributes_dict['n_epochs'] = self.user_input_params["n_epochs"]
+            additional_attributes_dict['num_monte_carlo'] = self.user_input_params["num_monte_carlo"]
+        return _model_registry.get_model_class(model_name=self.current_model_name)(
+            optuna_trial=optuna_trial, datasets=self.datasets,  featureset=self.featureset,
+            test_set_size_percentage=self.test_set_size_percentage, target_column=self.target_column,
+            current_model_name=self.current_model_name,
+            **additional_attributes_dict
+        )
+
+    def warm_start_study(self, study: optuna.study.Study):
+        """
+        Seed a new study with the completed trials of previous runs of the same model.
+        Transferred trials are only used by the sampler, they are excluded from the best trial of this run.
+        :param study: new study to warm-start
+        """
+        if self.user_input_params["multi_objective"] and self.user_input_params["warm_start_mode"] != 'enqueue':
+            # transferred trials carry a single value, which a study with several directions rejects
+            raise Exception('Trials of previous runs can only be transferred to single-objective studies, '
+                            'use warm_start_mode enqueue for multi_objective.')
+        prior_trials = []
+        for db_path in self.user_input_params["warm_start_studies"]:
+            if not os.path.exists(db_path):
+                raise Exception('Specified study database ' + db_path + ' for warm start does not exist. '
+                                'Please double-check.')
+            storage_url = "sqlite:///" + db_path
+            for study_summary in optuna.study.get_all_study_summaries(storage=storage_url):
+                if '-MODEL' + self.current_model_name + '-' not in study_summary.study_name:
+                    print('Skip study ' + study_summary.study_name + ' for warm start, as it optimized another model.')
+                    continue
+                prior_study = optuna.load_study(study_name=study_summary.study_name, storage=storage_url)
+                # only trials that were really evaluated in the previous run
+                prior_trials += [(study_summary.study_name, prior_trial) for prior_trial in prior_study.get_trials(
+                    deepcopy=False, states=(optuna.trial.TrialState.COMPLETE,))
+                                 if 'warm_start_source' not in prior_trial.user_attrs
+                                 and 'memoized_from' not in prior_trial.user_attrs]
+        print('Warm start with ' + str(len(prior_trials)) + ' trials of previous runs')
+        if self.user_input_params["warm_start_mode"] in ['enqueue', 'both']:
+            # enqueue before transferring, as enqueued params already existing in the study would be skipped
+            # the validation result is the first objective of single- and multi-objective studies
+            for _, prior_trial in sorted(prior_trials, key=lambda trial: trial[1].values[0])[
+                                  :self.user_input_params["warm_start_top_k"]]:
+                study.enqueue_trial(params=prior_trial.params, skip_if_exists=True)
+        if self.user_input_params["warm_start_mode"] in ['transfer', 'both']:
+            study.add_trials([optuna.trial.create_trial(params=prior_trial.params,
+                                                        distributions=prior_trial.distributions,
+                                                        value=prior_trial.values[0],
+                                                        user_attrs={'warm_start_source': prior_study_name})
+                              for prior_study_name, prior_trial in prior_trials])
+            self.n_transferred_trials = len(prior_trials)
+
+    def get_completed_trials(self) -> list:
+        """
+        Get the completed trials evaluated in this run, i.e. without the trials transferred from previous runs
+        :return: list of completed trials
+        """
+        return [completed_trial for completed_trial in self.study.get_trials(
+                    deepcopy=False, states=(optuna.trial.TrialState.COMPLETE,))
+                if 'warm_start_source' not in completed_trial.user_attrs]
+
+    def get_best_trial(self) -> optuna.trial.FrozenTrial:
+        """
+        Get the best trial evaluated in this run. For ties, the first trial is returned, as the later ones are
+        duplicates getting the memoized result without persisted files.
+        For multi-objective studies, the most accurate trial of the Pareto front meeting max_latency_ms is returned,
+        the fastest trial of the Pareto front if none meets it.
+        :return: best trial
+        """
+        completed_trials = self.get_completed_trials()
+        if len(completed_trials) == 0:
+            raise Exception('No trial of model ' + self.current_model_name + ' completed.')
+        if not self.user_input_params["multi_objective"]:
+            return min(completed_trials, key=lambda completed_trial: completed_trial.value)
+        pareto_front = self.get_pareto_front_trials()
+        max_latency_ms = self.user_input_params["max_latency_ms"]
+        eligible_trials = [front_trial for front_trial in pareto_front
+                           if max_latency_ms is None or front_trial.values[1] <= max_latency_ms]
+        if len(eligible_trials) == 0:
+            print('No trial of the Pareto front meets the latency cap of ' + str(max_latency_ms) +
+                  ' ms per row, select the fastest one')
+            return min(pareto_front, key=lambda front_trial: front_trial.values[1])
+        return min(eligible_trials, key=lambda front_trial: front_trial.values[0])
+
+    def get_pareto_front_trials(self) -> list:
+        """
+        Get the completed trials of this run that are not dominated by another one regarding the validation result
+        and the prediction latency
+        :return: list of trials of the Pareto front in the order of their numbers
+        """
+        completed_trials = self.get_completed_trials()
+        return [completed_trial for completed_trial in completed_trials
+                if not any(dominates(values=other_trial.values, other_values=completed_trial.values)
+                           for other_trial in completed_trials)]
+
+    def get_objective_values(self, trial: optuna.trial.FrozenTrial):
+        """
+        Get the result of a completed trial in the format returned by the objective
+        :param trial: completed trial
+        :return: validation result, tuple of validation result and per-row prediction latency for multi-objective
+        """
+        return tuple(trial.values) if self.user_input_params["multi_objective"] else trial.value
+
+    def get_storage(self) -> optuna.storages.RDBStorage:
+        """
+        Get the storage of the study, which is shared by all worker processes
+        :return: optuna storage
+        """
+        return optuna.storages.RDBStorage(
+            "sqlite:///" + self.save_path + 'Optuna_DB-' + self.study_name + ".db", heartbeat_interval=60,
+            grace_period=120, failed_trial_callback=optuna.storages.RetryFailedTrialCallback(max_retry=3),
+            # wait for the lock of the database instead of failing if several processes write at the same time
+            engine_kwargs={'connect_args': {'timeout': 300}}
+        )
+
+    def get_sampler(self, seed: int) -> optuna.samplers.BaseSampler:
+        """
+        Get the sampler of the study. For parallel trials, the constant liar heuristic is used to avoid that
+        all workers suggest similar params based on the same completed trials.
+        Multi-objective studies use NSGA-II to approximate the Pareto front.
+        :param seed: seed of the sampler, needs to differ between worker processes
+        :return: optuna sampler
+        """
+        if self.user_input_params["multi_objective"]:
+            return optuna.samplers.NSGAIISampler(seed=seed)
+        return optuna.samplers.TPESampler(seed=seed, constant_liar=self.user_input_params["n_jobs"] > 1)
+
+    def get_pruner(self) -> optuna.pruners.BasePruner:
+        """
+        Get the pruner of the study. Multi-objective trials are not pruned, as optuna does not support reporting
+        intermediate values for them.
+        :return: optuna pruner
+        """
+        if self.user_input_params["multi_objective"]:
+            return optuna.pruners.NopPruner()
+        if self.user_input_params["pruner"] == 'hyperband':
+            # every trial gets at least the budget of its model family, e.g. a number of epochs for PyTorch models
+            min_resource = 1
+            if self.reports_epochs():
+                min_resource = self.user_input_params["pruning_epoch_budget"]
+                if min_resource is None:
+                    min_resource = getattr(_model_registry.get_model_class(model_name=self.current_model_name),
+                                           'pruning_epoch_budget', 1)
+            return optuna.pruners.HyperbandPruner(min_resource=min_resource, max_resource='auto', reduction_factor=3)
+        return optuna.pruners.PercentilePruner(percentile=80, n_min_trials=20)
+
+    def reports_epochs(self) -> bool:
+        """
+        Check if the validation loss of each epoch is reported for pruning instead of the result of each fold.
+        Only the case for PyTorch models with hyperband pruning and serially evaluated folds, as the trial can not
+        be reported to from fold worker processes.
+        :return: bool reflecting if epochs are reported
+        """
+        return self.user_input_params["pruner"] == 'hyperband' and self.user_input_params["fold_jobs"] == 1 and \
+            not self.uses_fold_workers() and not self.user_input_params["multi_objective"] and \
+            not self.uses_low_fidelity_stage() and \
+            _model_registry.get_model_family(model_name=self.current_model_name) == 'torch'
+
+    def has_time_budget(self) -> bool:
+        """
+        Check if the trials have a time budget. Then the folds are evaluated in worker processes that are terminated
+        if the budget is exceeded, see uses_fold_workers().
+        :return: bool reflecting if the trials have a time budget
+        """
+        return self.user_input_params["trial_timeout"] is not None or \
+            self.user_input_params["study_timeout"] is not None
+
+    def uses_low_fidelity_stage(self) -> bool:
+        """
+        Check if the trials are first evaluated on a shortened history and only promoted to the full folds if they
+        are not pruned. The low-fidelity stage is reported to the pruner as first step, so that it is compared with
+        the low-fidelity stage of the other trials, just like a fold with the same fold of the other trials.
+        Not the case for multi-objective studies, as their trials are not pruned, and for shuffled cv folds,
+        as the most recent rows of their train set are no shortened history.
+        :return: bool reflecting if the low-fidelity stage is used
+        """
+        return self.user_input_params["low_fidelity_seasons"] is not None and \
+            not self.user_input_params["multi_objective"] and self.datasplit in ['timeseries-cv', 'train-val-test']
+
+    def uses_incremental_folds(self) -> bool:
+        """
+        Check if the training on each fold starts from the model fitted on the previous fold.
+        Only the case for expanding timeseries-cv folds, models supporting warm starts and serially evaluated folds
+        without a time budget, as the fitted models are not sent back from worker processes.
+        :return: bool reflecting if the folds are evaluated incrementally
+        """
+        return self.user_input_params["incremental_folds"] and self.datasplit == 'timeseries-cv' and \
+            self.user_input_params["fold_jobs"] == 1 and not self.uses_fold_workers() and \
+            _model_registry.get_model_class(model_name=self.current_model_name).supports_warm_start
+
+    def measures_latency(self) -> bool:
+        """
+        Check if the inference cost, i.e. the per-row prediction latency and the size of the model, is measured for
+        each fold, which needs an additional prediction of the validation set and a serialization of the model.
+        Only the case for multi-objective studies, as the latency is one of their objectives.
+        :return: bool reflecting if the latency is measured
+        """
+        return self.user_input_params["multi_objective"]
+
+    def uses_fold_workers(self) -> bool:
+        """
+        Check if the folds are evaluated in worker processes that can be terminated while evaluating a fold,
+        i.e. if the trials have a time budget or a memory limit
+        :return: bool reflecting if the folds are evaluated in terminable worker processes
+        """
+        return self.has_time_budget() or self.user_input_params["trial_memory_limit_mb"] is not None
+
+    def recycle_fold_workers(self):
+        """
+        Count the trials evaluated by the worker processes and restart them after trials_per_worker trials,
+        so that graphs, kernels and allocator caches accumulated by the model libraries are released
+        """
+        if self.user_input_params["trials_per_worker"] is None:
+            return
+        self.n_fold_worker_trials += 1
+        if self.n_fold_worker_trials > self.user_input_params["trials_per_worker"]:
+            for worker in self.fold_workers:
+                worker.terminate()
+            self.n_fold_worker_trials = 1
+
+    def get_trial_deadline(self, trial_start_time: float) -> tuple:
+        """
+        Get the time at which a trial has to be stopped, the earlier of its own and the study's time budget
+        :param trial_start_time: start of the trial (as time.time())
+        :return: tuple of the deadline (None if there is no time budget) and the reason to record if it is exceeded
+        """
+        deadline, reason = None, None
+        if self.user_input_params["trial_timeout"] is not None:
+            deadline = trial_start_time + self.user_input_params["trial_timeout"]
+            reason = 'timeout: trial exceeded ' + str(self.user_input_params["trial_timeout"]) + ' s'
+        if self.study_deadline is not None and (deadline is None or self.study_deadline < deadline):
+            deadline = self.study_deadline
+            reason = 'timeout: time budget of the study exhausted'
+        return deadline, reason
+
     def objective(self, trial: optuna.trial.Trial):
         """
         Objective function for optuna optimization that returns a score
         :param trial: trial of optuna for optimization
         :return: score of the current hyperparameter config
         """
-        if (trial.number != 0) and (self.user_input_params["intermediate_results_interval"] is not None) and (
-                trial.number % self.user_input_params["intermediate_results_interval"] == 0):
-            print('Generate intermediate test results at trial ' + str(trial.number))
-            _ = self.generate_results_on_test()
+        # trials transferred from previous runs are numbered first
+        n_trials_of_run = trial.number - self.n_transferred_trials
+        if (n_trials_of_run != 0) and (self.user_input_params["intermediate_results_interval"] is not None) and (
+                n_trials_of_run % self.user_input_params["intermediate_results_interval"] == 0):
+            print('Generate intermediate test results at trial ' + str(trial.number) + ' in the background')
+            self.submit_intermediate_results(n_finished_trials=n_trials_of_run)
         # Create model
         # Setup timers for runtime logging
         start_process_time = time.process_time()
         start_realclock_time = time.time()
-        # in case a model has attributes not part of the base class hand them over in a dictionary to keep the same call
-        # (name of the attribute and key in the dictionary have to match)
-        additional_attributes_dict = {}
-        if issubclass(helper_functions.get_mapping_name_to_class()[self.current_model_name], _torch_model.TorchModel):
-            # additional attributes for torch models
-            additional_attributes_dict['batch_size'] = self.user_input_params["batch_size"]
-            additional_attributes_dict['n_epochs'] = self.user_input_params["n_epochs"]
-            additional_attributes_dict['num_monte_carlo'] = self.user_input_params["num_monte_carlo"]
-            early_stopping_points = []  # log early stopping point at each fold for torch and tensorflow models
+        self.phase_timer = phase_timer.PhaseTimer()
+        early_stopping_points = []  # log early stopping point at each fold for torch and tensorflow models
+        # inference cost of the model fitted on each fold, only measured for multi-objective studies
+        predict_latencies, model_sizes = [], []
+        n_cached_folds = 0
+        peak_rss_values = []  # peak memory of the process evaluating each fold
         try:
-            model: _base_model.BaseModel = helper_functions.get_mapping_name_to_class()[self.current_model_name](
-                optuna_trial=trial, datasets=self.datasets,  featureset=self.featureset,
-                test_set_size_percentage=self.test_set_size_percentage, target_column=self.target_column,
-                current_model_name=self.current_model_name,
-                **additional_attributes_dict
-            )
+            with self.phase_timer.phase('model_creation'):
+                model = self.create_model(optuna_trial=trial)
         except Exception as exc:
             print(traceback.format_exc())
             print(exc)
             print(trial.params)
             print('Trial failed. Error in model creation.')
-            self.clean_up_after_exception(trial_number=trial.number, trial_params=trial.params,
-                                          reason='model creation: ' + str(exc))
+            self.clean_up_after_exception(trial=trial, reason='model creation: ' + str(exc))
             raise optuna.exceptions.TrialPruned()
 
         self.dataset = model.dataset
-        # some model can not procduce reliable forecasts with less than two seasonal cycles in the data, what can
-        # happen with timeseries-cv. In this case, datasplit will be set to train-val-test
-        if self.test_set_size_percentage == 2021:
-            test = self.dataset.loc['2021-01-01': '2021-12-31']
-            train_val = pd.concat([self.dataset, test]).drop_duplicates(keep=False)
-            train_val.index.freq = train_val.index.inferred_freq
-            smallest_split_length = train_val.shape[0] / self.n_splits
-        else:
-            smallest_split_length = (100 - self.test_set_size_percentage) * 0.01 * self.dataset.shape[0] / self.n_splits
-        if self.datasplit == 'cv' and self.current_model_name == 'es':
-            print('Exponential Smoothing depends on continuous time series. Will set datasplit to timeseries-cv.')
-            self.datasplit = 'timeseries-cv'
-        elif self.datasplit == 'timeseries-cv' and smallest_split_length < 2 * self.datasets.seasonal_periods:
-            print('First timeseries-cv split has less than 2 seasonal cycles. Will set datasplit to train-val-test.')
-            self.datasplit = 'train-val-test'
+        self.adjust_datasplit()
 
-        # save the unfitted model
-        os.makedirs(self.save_path + 'temp/', exist_ok=True)
-        model.save_model(path=self.save_path + 'temp/',
-                         filename='unfitted_model_trial' + str(trial.number))
         print('Params for Trial ' + str(trial.number))
         print(trial.params)
-        if self.check_params_for_duplicate(current_params=trial.params):
-            print('Trial params are a duplicate.')
-            self.clean_up_after_exception(trial_number=trial.number, trial_params=trial.params,
-                                          reason='pruned: duplicate')
+        memoized_trial = self.get_memoized_trial(current_params=trial.params)
+        if memoized_trial is not None:
+            # duplicates are suggested by design of the TPE sampler, no need to fit the same model again
+            memoized_trial_number, memoized_val_result = memoized_trial
+            print('Trial params are a duplicate of trial ' + str(memoized_trial_number) + '.')
+            trial.set_user_attr('memoized_from', memoized_trial_number)
+            self.write_runtime_csv(dict_runtime={'Trial': trial.number,
+                                                 'process_time_s': time.process_time() - start_process_time,
+                                                 'real_time_s': time.time() - start_realclock_time,
+                                                 'params': trial.params,
+                                                 'note': 'duplicate of trial ' + str(memoized_trial_number),
+                                                 **self.phase_timer.get_runtime_columns()})
+            return memoized_val_result
+        if self.get_params_key(params=trial.params) in self.pruned_params:
+            print('Trial params are a duplicate of a pruned trial.')
+            self.clean_up_after_exception(trial=trial, reason='pruned: duplicate')
             raise optuna.exceptions.TrialPruned()
+        # keep the unfitted model in memory, it is only saved if the trial becomes the best one
+        os.makedirs(self.save_path + 'temp/', exist_ok=True)
+        with self.phase_timer.phase('snapshot'):
+            model_snapshot = model.get_snapshot()
         # Iterate over all folds
         objective_values = []
-        validation_results = pd.DataFrame(index=range(0, self.dataset.shape[0]))
+        # predictions and metrics of the folds, the arrays have different lengths
+        validation_results = {}
 
-        folds = helper_functions.get_folds(datasplit=self.datasplit,
-                                           n_splits=self.user_input_params["n_splits"])
+        data_split_plan = self.get_split_plan()
+        # the user attributes of the study are read from the storage, so they are only checked once per process
+        if not self.split_plan_stored:
+            if 'split_plan' not in self.study.user_attrs:
+                self.study.set_user_attr('split_plan', data_split_plan.to_dict())
+            self.split_plan_stored = True
 
-        for fold in range(folds):
-            fold_name = "fold_" + str(fold)
-            if self.test_set_size_percentage == 2021:
-                pass
-            else:
-                train_val, _ = train_test_split(self.dataset,
-                                                   test_size=self.user_input_params["test_set_size_percentage"] * 0.01,
-                                                   random_state=42, shuffle=False)
-            if self.datasplit == "timeseries-cv" or self.datasplit == "cv":
-                train_indexes, val_indexes = helper_functions.get_indexes(df=train_val,
-                                                                          n_splits=self.user_input_params["n_splits"],
-                                                                          datasplit=self.datasplit)
-                train, val = train_val.iloc[train_indexes[fold]], train_val.iloc[val_indexes[fold]]
-            else:
-                train, val = train_test_split(train_val,
-                                              test_size=self.user_input_params["val_set_size_percentage"] * 0.01,
-                                              random_state=42, shuffle=False)
-
-            # load the unfitted model to prevent information leak between folds
-            model = _model_functions.load_model(path=self.save_path + 'temp/',
-                                                filename='unfitted_model_trial' + str(trial.number))
+        low_fidelity_fold = None
+        if self.uses_low_fidelity_stage():
+            low_fidelity_fold = data_split_plan.get_low_fidelity_fold(
+                n_train_rows=self.user_input_params["low_fidelity_seasons"] * self.seasonal_periods)
+        # the steps reported to the pruner are shifted by the low-fidelity stage
+        n_low_fidelity_steps = 0 if low_fidelity_fold is None else 1
 
-            try:
-                # run train and validation loop for this fold
-                try:
-                    y_pred = model.train_val_loop(train=train, val=val)[0]
-                except Exception as exc:
+        if self.uses_fold_workers():
+            self.recycle_fold_workers()
+        # results are gathered in fold order, so the pruning works as for serially evaluated folds
+        fold_results = self.get_fold_results(trial=trial, model_snapshot=model_snapshot, folds=data_split_plan.folds,
+                                             trial_start_time=start_realclock_time,
+                                             featureset_name=model.featureset_name,
+                                             low_fidelity_fold=low_fidelity_fold)
+        try:
+            for step, fold_result in enumerate(fold_results):
+                fold = step - n_low_fidelity_steps
+                fold_name = "fold_" + str(fold) if fold >= 0 else 'low_fidelity'
+                self.phase_timer.add_fold_durations(fold=fold if fold >= 0 else fold_name,
+                                                    durations=fold_result['phase_times'])
+                if fold_result['peak_rss_mb'] is not None:
+                    peak_rss_values.append(fold_result['peak_rss_mb'])
+                if fold_result['pruned'] is not None:
+                    if len(peak_rss_values) > 0:
+                        trial.set_user_attr('peak_rss_mb', float(np.max(peak_rss_values)))
+                    # timeouts, exceeded memory limits and died workers are failures, not pruned by the pruner
+                    failed = fold_result['pruned'].startswith(('timeout', 'memory', 'died'))
+                    self.clean_up_after_exception(
+                        trial=trial, reason=fold_result['pruned'] if failed else 'pruned: ' + fold_result['pruned'])
+                    raise optuna.exceptions.TrialPruned()
+                if fold_result['training_error'] is not None:
                     print('Trial failed. Error in model training.')
-                    print(traceback.format_exc())
-                    print(exc)
+                    print(fold_result['training_error'])
                     print(trial.params)
-                    self.clean_up_after_exception(trial_number=trial.number, trial_params=trial.params,
-                                                  reason='model creation: ' + str(exc))
+                    self.clean_up_after_exception(trial=trial,
+                                                  reason='model creation: ' + fold_result['training_error'])
                     raise optuna.exceptions.TrialPruned()
+                if fold < 0:
+                    # the trial is only promoted to the full folds if its low-fidelity result ranks well
+                    low_fidelity_result = sklearn.metrics.mean_squared_error(y_true=fold_result['y_true'],
+                                                                             y_pred=fold_result['y_pred'])
+                    trial.set_user_attr('low_fidelity_val_result', low_fidelity_result)
+                    trial.report(value=low_fidelity_result, step=step)
+                    if trial.should_prune():
+                        self.clean_up_after_exception(trial=trial, reason='pruned: low fidelity')
+                        raise optuna.exceptions.TrialPruned()
+                    continue
+
+                # the shortened training of a warm-started fold says nothing about the epochs needed from scratch
+                if fold_result['early_stopping_point'] is not None and not fold_result['warm_started']:
+                    early_stopping_points.append(fold_result['early_stopping_point'])
+                if fold_result['predict_latency_ms_per_row'] is not None:
+                    predict_latencies.append(fold_result['predict_latency_ms_per_row'])
+                n_cached_folds += int(fold_result.get('cached', False))
+                if fold_result['model_size_mb'] is not None:
+                    model_sizes.append(fold_result['model_size_mb'])
 
-                if hasattr(model, 'early_stopping_point'):
-                    early_stopping_points.append(
-                        model.early_stopping_point if model.early_stopping_point is not None else model.n_epochs)
-
-                if len(y_pred) == (len(val) - 1):
-                    # might happen if batch size leads to a last batch with one sample which will be dropped then
-                    print('val has one element less than y_true (e.g. due to batch size) -> drop last element')
-                    val = val[:-1]
-
-                objective_value = sklearn.metrics.mean_squared_error(y_true=val[self.target_column], y_pred=y_pred)
-                # report value for pruning
-                trial.report(value=objective_value,
-                             step=0 if self.datasplit == 'train-val-test' else int(fold_name[-1]))
-                if trial.should_prune():
-                    self.clean_up_after_exception(trial_number=trial.number, trial_params=trial.params,
-                                                  reason='pruned')
+                self.phase_timer.start('metrics')
+                y_pred, y_true = fold_result['y_pred'], fold_result['y_true']
+                objective_value = sklearn.metrics.mean_squared_error(y_true=y_true, y_pred=y_pred)
+                # report value for pruning, if the epochs are not reported instead
+                reports_folds = not self.reports_epochs() and not self.user_input_params["multi_objective"]
+                if reports_folds:
+                    trial.report(value=objective_value,
+                                 step=(0 if self.datasplit == 'train-val-test' else fold) + n_low_fidelity_steps)
+                if reports_folds and trial.should_prune():
+                    self.clean_up_after_exception(trial=trial, reason='pruned')
                     raise optuna.exceptions.TrialPruned()
 
                 # store results
                 objective_values.append(objective_value)
-                validation_results.at[0:len(train) - 1, fold_name + '_train_true'] = train[self.target_column]
-
-                if 'lstm' in self.current_model_name:
-                    try:
-                        validation_results.at[0:len(train) - model.seq_length - 1, fold_name + '_train_pred'] = \
-                            model.predict(X_in=train)[0].flatten()
-                    except:
-                        validation_results.at[0:len(train) - model.seq_length - 2, fold_name + '_train_pred'] = \
-                            model.predict(X_in=train)[0].flatten()
-                else:
-                    validation_results.at[0:len(train) - 1, fold_name + '_train_pred'] = \
-                        model.predict(X_in=train)[0].flatten()
-
-                validation_results.at[0:len(val) - 1, fold_name + '_val_true'] = \
-                    val.loc[:, [self.target_column]].values.reshape(-1)
-                validation_results.at[0:len(y_pred) - 1, fold_name + '_val_pred'] = y_pred.flatten()
+                train, _ = data_split_plan.get_fold(df=self.dataset, fold=fold)
+                # the in-sample predictions are only added for the best trial, see add_in_sample_predictions()
+                validation_results[fold_name + '_train_true'] = train[self.target_column].values
+                validation_results[fold_name + '_val_true'] = y_true
+                validation_results[fold_name + '_val_pred'] = y_pred
 
-                for metric, value in eval_metrics.get_evaluation_report(y_pred=y_pred, y_true=val[self.target_column],
+                for metric, value in eval_metrics.get_evaluation_report(y_pred=y_pred, y_true=y_true,
                                                                         prefix=fold_name + '_').items():
-                    validation_results.at[0, metric] = value
-            except (RuntimeError, TypeError, ValueError, np.linalg.LinAlgError) as exc:
-                print(traceback.format_exc())
-                print(exc)
-                print('Trial failed. Error in optim loop.')
-                self.clean_up_after_exception(trial_number=trial.number, trial_params=trial.params,
-                                              reason='model optimization: ' + str(exc))
-                raise optuna.exceptions.TrialPruned()
+                    validation_results[metric] = np.array([value])
+                self.phase_timer.stop('metrics', fold=fold)
+        except (RuntimeError, TypeError, ValueError, np.linalg.LinAlgError) as exc:
+            print(traceback.format_exc())
+            print(exc)
+            print('Trial failed. Error in optim loop.')
+            self.clean_up_after_exception(trial=trial, reason='model optimization: ' + str(exc))
+            raise optuna.exceptions.TrialPruned()
+        finally:
+            # stops the evaluation of the remaining folds if the trial was pruned
+            fold_results.close()
         current_val_result = float(np.mean(objective_values))
-        if self.current_best_val_result is None or current_val_result < self.current_best_val_result:
-            if hasattr(model, 'early_stopping_point'):
-                # take mean of early stopping points of all folds for refitting of final model
-                self.early_stopping_point = int(np.mean(early_stopping_points))
+        if len(early_stopping_points) > 0:
+            # take mean of early stopping points of all folds for refitting of final model
+            trial.set_user_attr('early_stopping_point', int(np.mean(early_stopping_points)))
+        predict_latency = float(np.mean(predict_latencies)) if len(predict_latencies) > 0 else None
+        if predict_latency is not None:
+            trial.set_user_attr('predict_latency_ms_per_row', predict_latency)
+        model_size = float(np.max(model_sizes)) if len(model_sizes) > 0 else None
+        if model_size is not None:
+            trial.set_user_attr('model_size_mb', model_size)
+        if n_cached_folds > 0:
+            trial.set_user_attr('n_cached_folds', n_cached_folds)
+        peak_rss = float(np.max(peak_rss_values)) if len(peak_rss_values) > 0 else None
+        if peak_rss is not None:
+            trial.set_user_attr('peak_rss_mb', peak_rss)
+        objective_result = (current_val_result, predict_latency) if self.user_input_params["multi_objective"] \
+            else current_val_result
+        if self.is_new_best_val_result(current_val_result=objective_result):
             self.current_best_val_result = current_val_result
-            # persist results
-            validation_results.to_csv(self.save_path + 'temp/validation_results_trial' + str(trial.number) + '.csv',
-                                      sep=',', decimal='.', float_format='%.10f', index=False)
-            # delete previous results
-            for file in os.listdir(self.save_path + 'temp/'):
-                if 'trial' + str(trial.number) not in file:
-                    os.remove(self.save_path + 'temp/' + file)
-        else:
-            # delete unfitted model
-            os.remove(self.save_path + 'temp/' + 'unfitted_model_trial' + str(trial.number))
+            # persist unfitted model and results
+            with self.phase_timer.phase('save_model'):
+                model.save_model(path=self.save_path + 'temp/', filename='unfitted_model_trial' + str(trial.number))
+            with self.phase_timer.phase('write_results'):
+                np.savez(self.save_path + 'temp/validation_results_trial' + str(trial.number) + '.npz',
+                         **validation_results)
+            # delete previous results, for multi-objective studies only the ones not on the Pareto front anymore
+            trial_numbers_to_keep = [trial.number]
+            if self.user_input_params["multi_objective"]:
+                trial_numbers_to_keep += [front_trial.number for front_trial in self.get_pareto_front_trials()]
+            self.delete_temp_files_of_finished_trials(trial_numbers_to_keep=trial_numbers_to_keep)
 
         # save runtime information of this trial
         self.write_runtime_csv(dict_runtime={'Trial': trial.number,
                                              'process_time_s': time.process_time() - start_process_time,
                                              'real_time_s': time.time() - start_realclock_time,
-                                             'params': trial.params, 'note': 'successful'})
+                                             'params': trial.params,
+                                             'note': 'successful' if n_cached_folds == 0
+                                             else 'successful, ' + str(n_cached_folds) + ' folds from trial cache',
+                                             'predict_latency_ms_per_row': predict_latency,
+                                             'model_size_mb': model_size,
+                                             'peak_rss_mb': peak_rss,
+                                             **self.phase_timer.get_runtime_columns()})
+        self.trial_memo[self.get_params_key(params=trial.params)] = (trial.number, objective_result)
+
+        return objective_result
+
+    def adjust_datasplit(self):
+        """
+        Adjust the datasplit to the model and the dataset
+        """
+        # some model can not procduce reliable forecasts with less than two seasonal cycles in the data, what can
+        # happen with timeseries-cv. In this case, datasplit will be set to train-val-test
+        smallest_split_length = self.get_split_plan().n_train_val / self.n_splits
+        if self.datasplit == 'cv' and self.current_model_name == 'es':
+            print('Exponential Smoothing depends on continuous time series. Will set datasplit to timeseries-cv.')
+            self.datasplit = 'timeseries-cv'
+        elif self.datasplit == 'timeseries-cv' and smallest_split_length < 2 * self.datasets.seasonal_periods:
+            print('First timeseries-cv split has less than 2 seasonal cycles. Will set datasplit to train-val-test.')
+            self.datasplit = 'train-val-test'
+
+    def get_split_plan(self) -> split_plan.SplitPlan:
+        """
+        Get the split plan for the current dataset and datasplit, which is only computed once and then shared
+        by all trials, models and featuresets
+        :return: split plan
+        """
+        return split_plan.get_split_plan(index=self.dataset.index, datasplit=self.datasplit,
+                                         n_splits=self.user_input_params["n_splits"],
+                                         test_set_size_percentage=self.test_set_size_percentage,
+                                         val_set_size_percentage=self.user_input_params["val_set_size_percentage"])
+
+    def get_fold_results(self, trial: optuna.trial.Trial, model_snapshot: bytes, folds: list,
+                         trial_start_time: float, featureset_name: str, low_fidelity_fold: tuple = None):
+        """
+        Evaluate the unfitted model of a trial on all folds and yield the results in fold order.
+        With a low-fidelity fold, its result is yielded first and the full folds are only evaluated if the trial is
+        not pruned afterwards, i.e. if the next result is requested.
+        See get_fold_results_of_stage() for more information.
+        :param trial: trial of optuna for optimization
+        :param model_snapshot: snapshot of the unfitted model of the trial
+        :param folds: list of tuples with the positions of the train and validation set of each fold
+        :param trial_start_time: start of the trial (as time.time())
+        :param featureset_name: name of the featureset the dataset of the trial is based on
+        :param low_fidelity_fold: tuple with the positions of the train and validation set of the low-fidelity stage,
+            None if there is no low-fidelity stage
+        :return: generator yielding the result of each fold, see evaluate_fold()
+        """
+        stages = [folds] if low_fidelity_fold is None else [[low_fidelity_fold], folds]
+        for stage_folds in stages:
+            if self.trial_cache is None:
+                yield from self.get_fold_results_of_stage(trial=trial, model_snapshot=model_snapshot,
+                                                          folds=stage_folds, trial_start_time=trial_start_time)
+                continue
+            cache_keys = self.get_fold_cache_keys(params=trial.params, folds=stage_folds,
+                                                  featureset_name=featureset_name)
+            cached_results = [self.trial_cache.load(key=cache_key) for cache_key in cache_keys]
+            if any(cached_result is None for cached_result in cached_results) and \
+                    (self.uses_incremental_folds() or self.reports_epochs()):
+                # the folds depend on each other, e.g. via warm starts, so all of them are evaluated again
+                cached_results = [None] * len(stage_folds)
+            missing_folds = [fold_positions for fold_positions, cached_result in zip(stage_folds, cached_results)
+                             if cached_result is None]
+            evaluated_results = self.get_fold_results_of_stage(trial=trial, model_snapshot=model_snapshot,
+                                                               folds=missing_folds,
+                                                               trial_start_time=trial_start_time)
+            try:
+                for cache_key, cached_result in zip(cache_keys, cached_results):
+                    if cached_result is not None:
+                        yield cached_result
+                        continue
+                    fold_result = next(evaluated_results)
+                    if fold_result['pruned'] is None and fold_result['training_error'] is None:
+                        self.trial_cache.store(key=cache_key, fold_result=fold_result)
+                    yield fold_result
+            finally:
+                evaluated_results.close()
+
+    def get_fold_cache_keys(self, params: dict, folds: list, featureset_name: str) -> list:
+        """
+        Get the addresses of the results of folds in the trial cache. Besides the params of the trial, they depend on
+        the content of the dataset of the trial, the split plan, the positions of the fold and the settings changing
+        the training of the model.
+        The dataset differs between trials with featureset 'optimize' or with dim reduction, so its fingerprint is
+        kept per featureset and dim reduction setting.
+        :param params: params of the trial
+        :param folds: list of tuples with the positions of the train and validation set of each fold
+        :param featureset_name: name of the featureset the dataset of the trial is based on
+        :return: list of the addresses of the folds
+        """
+        fingerprint_key = (featureset_name, bool(params.get('pca', False)))
+        if fingerprint_key not in self.dataset_fingerprints:
+            self.dataset_fingerprints[fingerprint_key] = trial_cache.get_dataset_fingerprint(df=self.dataset)
+        split_plan_description = self.get_split_plan().to_dict()
+        settings = {'target_column': self.target_column, 'incremental_folds': self.uses_incremental_folds(),
+                    'measure_latency': self.measures_latency()}
+        for setting in ['batch_size', 'n_epochs', 'num_monte_carlo']:
+            settings[setting] = self.user_input_params[setting]
+        return [self.trial_cache.get_key(dataset=self.dataset_fingerprints[fingerprint_key],
+                                         split_plan=split_plan_description, model=self.current_model_name,
+                                         params=params, settings=settings,
+                                         fold=[split_plan.describe_indexer(train), split_plan.describe_indexer(val)])
+                for train, val in folds]
+
+    def get_fold_results_of_stage(self, trial: optuna.trial.Trial, model_snapshot: bytes, folds: list,
+                                  trial_start_time: float, predict_train: bool = False):
+        """
+        Evaluate the unfitted model of a trial on the folds of a stage and yield the results in fold order.
+        If fold_jobs is larger than one, all folds are submitted to a pool of worker processes at once,
+        otherwise each fold is only evaluated when its result is requested.
+        With incremental folds, the training on each fold starts from the model fitted on the previous fold,
+        see uses_incremental_folds().
+        If the trials have a time budget, the folds are evaluated in worker processes that are terminated when the
+        budget is exceeded, see get_fold_results_with_deadline().
+        Only the positions of the folds are handed over, the data is taken from the datasets, which are referenced
+        in shared memory if the featuresets are shared.
+        :param trial: trial of optuna for optimization, None if the folds are not evaluated within a trial
+        :param model_snapshot: snapshot of the unfitted model of the trial
+        :param folds: list of tuples with the positions of the train and validation set of each fold
+        :param trial_start_time: start of the trial (as time.time())
+        :param predict_train: whether to add the in-sample predictions on the train set, see evaluate_fold()
+        :return: generator yielding the result of each fold, see evaluate_fold()
+        """
+        if self.uses_fold_workers():
+            yield from self.get_fold_results_with_deadline(model_snapshot=model_snapshot, folds=folds,
+                                                           trial_start_time=trial_start_time,
+                                                           predict_train=predict_train)
+            return
+        if min(self.user_input_params["fold_jobs"], len(folds)) <= 1:
+            incremental_folds = self.uses_incremental_folds()
+            previous_model = None
+            for fold, fold_positions in enumerate(folds):
+                # the epochs of the first fold are the resource for multi-fidelity pruning
+                fold_result = evaluate_fold(model_snapshot=model_snapshot, datasets=self.datasets,
+                                            fold_positions=fold_positions, target_column=self.target_column,
+                                            measure_latency=self.measures_latency(),
+                                            epoch_report_trial=trial if self.reports_epochs() and fold == 0 else None,
+                                            warm_start_model=previous_model, return_model=incremental_folds,
+                                            predict_train=predict_train)
+                previous_model = fold_result.pop('model', None)
+                yield fold_result
+            return
+        if self.fold_executor is None:
+            self.fold_executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.user_input_params["fold_jobs"], mp_context=multiprocessing.get_context('spawn'))
+        futures = [self.fold_executor.submit(evaluate_fold, model_snapshot=model_snapshot, datasets=self.datasets,
+                                             fold_positions=fold_positions, target_column=self.target_column,
+                                             measure_latency=self.measures_latency(), predict_train=predict_train)
+                   for fold_positions in folds]
+        try:
+            for future in futures:
+                yield future.result()
+        finally:
+            # folds that did not start yet are not needed anymore if the trial was pruned
+            for future in futures:
+                future.cancel()
+
+    def get_fold_results_with_deadline(self, model_snapshot: bytes, folds: list, trial_start_time: float,
+                                       predict_train: bool = False):
+        """
+        Evaluate the folds in fold_jobs worker processes, each fold is only submitted when a worker gets free.
+        If the deadline of the trial or the memory limit of a worker is exceeded, the workers are terminated and a
+        result marking the trial as pruned is yielded.
+        :param model_snapshot: snapshot of the unfitted model of the trial
+        :param folds: list of tuples with the positions of the train and validation set of each fold
+        :param trial_start_time: start of the trial (as time.time())
+        :param predict_train: whether to add the in-sample predictions on the train set, see evaluate_fold()
+        :return: generator yielding the result of each fold, see evaluate_fold()
+        """
+        deadline, timeout_reason = self.get_trial_deadline(trial_start_time=trial_start_time)
+        n_workers = min(self.user_input_params["fold_jobs"], len(folds))
+        while len(self.fold_workers) < n_workers:
+            self.fold_workers.append(fold_worker.FoldWorker())
+        try:
+            for fold in range(n_workers):
+                self.fold_workers[fold].submit(evaluate_fold, model_snapshot=model_snapshot, datasets=self.datasets,
+                                               fold_positions=folds[fold], target_column=self.target_column,
+                                               measure_latency=self.measures_latency(), predict_train=predict_train)
+            for fold in range(len(folds)):
+                worker = self.fold_workers[fold % n_workers]
+                fold_result = worker.receive(deadline=deadline,
+                                             memory_limit_mb=self.user_input_params["trial_memory_limit_mb"])
+                if fold_result is None:
+                    if worker.failure == 'memory':
+                        reason = 'memory: worker exceeded ' + str(self.user_input_params["trial_memory_limit_mb"]) + \
+                                 ' MB'
+                    elif worker.failure == 'timeout':
+                        reason = timeout_reason
+                    else:
+                        reason = 'died: worker process died'
+                    yield {'training_error': None, 'early_stopping_point': None, 'warm_started': False,
+                           'phase_times': {}, 'peak_rss_mb': worker.failure_rss_mb,
+                           'predict_latency_ms_per_row': None, 'pruned': reason}
+                    return
+                if fold + n_workers < len(folds):
+                    worker.submit(evaluate_fold, model_snapshot=model_snapshot, datasets=self.datasets,
+                                  fold_positions=folds[fold + n_workers], target_column=self.target_column,
+                                  measure_latency=self.measures_latency(), predict_train=predict_train)
+                yield fold_result
+        finally:
+            # folds of a pruned trial that are still evaluated are not needed anymore
+            for worker in self.fold_workers:
+                if worker.busy:
+                    worker.terminate()
 
-        return current_val_result
+    def shutdown_fold_workers(self):
+        """
+        Shut down the worker processes evaluating the folds
+        """
+        if self.fold_executor is not None:
+            self.fold_executor.shutdown()
+            self.fold_executor = None
+        for worker in self.fold_workers:
+            worker.terminate()
+        self.fold_workers = []
+
+    def is_new_best_val_result(self, current_val_result) -> bool:
+        """
+        Check if the validation result of a trial is better than all results so far.
+        With parallel trials, the best result is read from the shared storage, as other processes complete trials too.
+        For multi-objective studies, the result has to be on the Pareto front, i.e. no completed trial is at least as
+        good in both objectives and better in one.
+        :param current_val_result: validation result of the current trial, tuple of validation result and per-row
+            prediction latency for multi-objective studies
+        :return: bool reflecting if the current result is the best so far
+        """
+        if self.user_input_params["multi_objective"]:
+            return not any(dominates(values=completed_trial.values, other_values=current_val_result)
+                           for completed_trial in self.get_completed_trials())
+        if self.user_input_params["n_jobs"] > 1:
+            completed_values = [completed_trial.value for completed_trial in self.get_completed_trials()]
+            self.current_best_val_result = min(completed_values) if len(completed_values) > 0 else None
+        return self.current_best_val_result is None or current_val_result < self.current_best_val_result
 
-    def clean_up_after_exception(self, trial_number: int, trial_params: dict, reason: str):
+    def delete_temp_files_of_finished_trials(self, trial_numbers_to_keep: list):
         """
-        Clean up things after an exception: delete unfitted model if it exists and update runtime csv
-        :param trial_number: number of the trial
-        :param trial_params: parameters of the trial
-        :param reason: hint for the reason of the Exception
+        Delete the temporary files of all finished trials except the specified ones.
+        Files of trials that are still running in other worker processes are kept.
+        :param trial_numbers_to_keep: numbers of the trials whose files should be kept
         """
-        if os.path.exists(self.save_path + 'temp/' + 'unfitted_model_trial' + str(trial_number)):
-            os.remove(self.save_path + 'temp/' + 'unfitted_model_trial' + str(trial_number))
-        self.write_runtime_csv(dict_runtime={'Trial': trial_number, 'process_time_s': np.nan, 'real_time_s': np.nan,
-                                             'params': trial_params, 'note': reason})
+        running_trial_numbers = [running_trial.number for running_trial in self.study.get_trials(
+            deepcopy=False, states=(optuna.trial.TrialState.RUNNING,))]
+        for file in os.listdir(self.save_path + 'temp/'):
+            trial_number = re.search(r'trial(\d+)', file)
+            if trial_number is None or int(trial_number.group(1)) in running_trial_numbers + trial_numbers_to_keep:
+                continue
+            try:
+                os.remove(self.save_path + 'temp/' + file)
+            except FileNotFoundError:
+                # already deleted by another worker process
+                pass
 
-    def write_runtime_csv(self, dict_runtime: dict):
+    def clean_up_after_exception(self, trial: optuna.trial.Trial, reason: str):
+        """
+        Clean up things after an exception: delete unfitted model if it exists and update runtime csv.
+        Only the params of trials pruned by the pruner are memoized. Trials failed e.g. because of a timeout or an
+        error might succeed with the same params, so their reason is stored as failure_reason.
+        :param trial: trial of optuna for optimization
+        :param reason: hint for the reason of the Exception, starting with 'pruned' if the trial was pruned
+        """
+        if os.path.exists(self.save_path + 'temp/' + 'unfitted_model_trial' + str(trial.number)):
+            os.remove(self.save_path + 'temp/' + 'unfitted_model_trial' + str(trial.number))
+        if reason.startswith('pruned'):
+            self.pruned_params.add(self.get_params_key(params=trial.params))
+        else:
+            trial.set_user_attr('failure_reason', reason)
+        self.write_runtime_csv(dict_runtime={'Trial': trial.number, 'process_time_s': np.nan, 'real_time_s': np.nan,
+                                             'params': trial.params, 'note': reason,
+                                             **self.phase_timer.get_runtime_columns()})
+
+    def write_runtime_csv(self, dict_runtime: dict = None):
         """
         Write runtime info to runtime csv file
-        :param dict_runtime: dictionary with runtime information
+        :param dict_runtime: dictionary with runtime information, if None only the header is written to a new file
         """
         with open(self.save_path + self.current_model_name + '_runtime_overview.csv', 'a') as runtime_file:
-            headers = ['Trial', 'refitting_cycle', 'process_time_s', 'real_time_s', 'params', 'note']
+            headers = ['Trial', 'refitting_cycle', 'process_time_s', 'real_time_s', 'params', 'note',
+                       'predict_latency_ms_per_row', 'model_size_mb', 'peak_rss_mb'] + \
+                phase_timer.get_phase_columns() + ['phase_times_per_fold']
             writer = csv.DictWriter(f=runtime_file, fieldnames=headers)
             if runtime_file.tell() == 0:
                 writer.writeheader()
-            writer.writerow(dict_runtime)
+            if dict_runtime is not None:
+                writer.writerow(dict_runtime)
 
     def calc_runtime_stats(self) -> dict:
         """
@@ -304,54 +1031,152 @@ class OptunaOptim:
         csv_file = pd.read_csv(self.save_path + self.current_model_name + '_runtime_overview.csv')
         if csv_file['Trial'].dtype is object and any(["retrain" in elem for elem in csv_file["Trial"]]):
             csv_file = csv_file[csv_file["Trial"].str.contains("retrain") is False]
-        process_times = csv_file['process_time_s']
-        real_times = csv_file['real_time_s']
-        process_time_mean, process_time_std, process_time_max, process_time_min = \
-            process_times.mean(), process_times.std(), process_times.max(), process_times.min()
-        real_time_mean, real_time_std, real_time_max, real_time_min = \
-            real_times.mean(), real_times.std(), real_times.max(), real_times.min()
-        self.write_runtime_csv({'Trial': 'mean', 'process_time_s': process_time_mean, 'real_time_s': real_time_mean})
-        self.write_runtime_csv({'Trial': 'std', 'process_time_s': process_time_std, 'real_time_s': real_time_std})
-        self.write_runtime_csv({'Trial': 'max', 'process_time_s': process_time_max, 'real_time_s': real_time_max})
-        self.write_runtime_csv({'Trial': 'min', 'process_time_s': process_time_min, 'real_time_s': real_time_min})
-        return {'process_time_mean': process_time_mean, 'process_time_std': process_time_std,
-                'process_time_max': process_time_max, 'process_time_min': process_time_min,
-                'real_time_mean': real_time_mean, 'real_time_std': real_time_std,
-                'real_time_max': real_time_max, 'real_time_min': real_time_min}
-
-    def check_params_for_duplicate(self, current_params: dict) -> bool:
+        runtime_stats = {}
+        for stat in ['mean', 'std', 'max', 'min']:
+            stat_row = {'Trial': stat}
+            # total times and the times of each phase, e.g. process_time_s -> process_time_mean
+            for column in ['process_time_s', 'real_time_s'] + phase_timer.get_phase_columns():
+                if column not in csv_file.columns:
+                    # e.g. runtime overview of a resumed run written before the phases were timed
+                    stat_row[column] = np.nan
+                else:
+                    stat_row[column] = getattr(pd.to_numeric(csv_file[column], errors='coerce'), stat)()
+                runtime_stats[column[:-2] + '_' + stat] = stat_row[column]
+            self.write_runtime_csv(stat_row)
+        return runtime_stats
+
+    @staticmethod
+    def get_params_key(params: dict) -> tuple:
+        """
+        Get a hashable key of the params of a trial for the lookup of duplicates
+        :param params: dictionary with the parameters of a trial
+        :return: key of the params
+        """
+        return tuple(sorted(params.items()))
+
+    def memoize_finished_trial(self, finished_trial: optuna.trial.FrozenTrial):
+        """
+        Add a finished trial to the memo if it completed or was pruned by the pruner.
+        Trials of previous runs and failed trials, see clean_up_after_exception(), are not memoized.
+        :param finished_trial: finished trial
+        """
+        if 'warm_start_source' in finished_trial.user_attrs:
+            # results of previous runs are not valid for this run
+            return
+        if finished_trial.state == optuna.trial.TrialState.COMPLETE:
+            self.trial_memo.setdefault(self.get_params_key(params=finished_trial.params),
+                                       (finished_trial.number, self.get_objective_values(trial=finished_trial)))
+        elif finished_trial.state == optuna.trial.TrialState.PRUNED and \
+                'failure_reason' not in finished_trial.user_attrs:
+            self.pruned_params.add(self.get_params_key(params=finished_trial.params))
+
+    def refresh_trial_memo(self):
+        """
+        Update the memo with the trials finished by other processes since the last refresh.
+        Only trials from the first trial that was unfinished at the last refresh on are checked again.
+        """
+        finished_trials = self.study.get_trials(
+            deepcopy=False, states=(optuna.trial.TrialState.COMPLETE, optuna.trial.TrialState.PRUNED))
+        # the trials are ordered by their number
+        for finished_trial in reversed(finished_trials):
+            if finished_trial.number < self.memo_refreshed_until:
+                break
+            self.memoize_finished_trial(finished_trial=finished_trial)
+        unfinished_trial_numbers = [unfinished_trial.number for unfinished_trial in self.study.get_trials(
+            deepcopy=False, states=(optuna.trial.TrialState.RUNNING, optuna.trial.TrialState.WAITING))]
+        self.memo_refreshed_until = min(unfinished_trial_numbers) if len(unfinished_trial_numbers) > 0 \
+            else finished_trials[-1].number + 1 if len(finished_trials) > 0 else 0
+
+    def get_memoized_trial(self, current_params: dict):
         """
         Check if params were already suggested which might happen by design of TPE sampler.
+        With parallel trials, the memo is updated with the trials finished by other processes if the params are unknown.
         :param current_params: dictionary with current parameters
-        :return: bool reflecting if current params were already used in the same study
+        :return: tuple of number and validation result of the completed trial with the same params or None
+        """
+        params_key = self.get_params_key(params=current_params)
+        if self.user_input_params["n_jobs"] > 1 and params_key not in self.trial_memo \
+                and params_key not in self.pruned_params:
+            self.refresh_trial_memo()
+        return self.trial_memo.get(params_key)
+
+    def submit_intermediate_results(self, n_finished_trials: int):
+        """
+        Generate intermediate results on the test set in a background worker, so that the optimization continues.
+        The worker gets a snapshot of the current best trial, as its files might be deleted by a new best trial.
+        Pending results that were not started yet are replaced by the newer ones.
+        :param n_finished_trials: number of trials of this run finished so far
         """
-        past_params = [trial.params for trial in self.study.trials[:-1]]
-        return current_params in past_params
+        if len(self.get_completed_trials()) == 0:
+            return
+        best_trial = self.get_best_trial()
+        for model_filename, future in list(self.intermediate_futures.items()):
+            if future.cancel():
+                os.remove(self.save_path + 'temp/' + model_filename)
+                del self.intermediate_futures[model_filename]
+        model_filename = 'intermediate_after_' + str(n_finished_trials) + '_unfitted_model'
+        shutil.copyfile(self.save_path + 'temp/unfitted_model_trial' + str(best_trial.number),
+                        self.save_path + 'temp/' + model_filename)
+        if self.intermediate_executor is None:
+            self.intermediate_executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+        self.intermediate_futures[model_filename] = self.intermediate_executor.submit(
+            _generate_intermediate_results, optuna_optim=self, best_trial=best_trial,
+            n_finished_trials=n_finished_trials, model_filename=model_filename)
+
+    def wait_for_intermediate_results(self):
+        """
+        Wait until all intermediate results of the background worker are written and shut it down
+        """
+        if self.intermediate_executor is None:
+            return
+        for model_filename, future in self.intermediate_futures.items():
+            try:
+                future.result()
+            except Exception as exc:
+                # intermediate results are only informative, so the optimization is not stopped
+                print('Generating intermediate results with ' + model_filename + ' failed: ' + str(exc))
+        self.intermediate_executor.shutdown()
+        self.intermediate_executor = None
+        self.intermediate_futures = {}
 
-    def generate_results_on_test(self) -> dict:
+    def generate_results_on_test(self, intermediate: bool = False, best_trial: optuna.trial.FrozenTrial = None,
+                                 n_finished_trials: int = None, model_filename: str = None) -> dict:
         """
         Calculate final evaluation scores.
+        :param intermediate: whether intermediate results are generated during the optimization
+        :param best_trial: best trial to evaluate, read from the study if None
+        :param n_finished_trials: number of finished trials of this run, read from the study if None
+        :param model_filename: filename of the unfitted model to evaluate, the file of the best trial if None
         :return: final evaluation scores
         """
         helper_functions.set_all_seeds()
         print("## Retrain best model and test ##")
         # Retrain on full train + val data with best hyperparams and apply on test
-        prefix = '' if len(self.study.trials) == self.user_input_params["n_trials"] else '/temp/'
-        if self.test_set_size_percentage == 2021:
-            test = self.dataset.loc['2020-01-01': '2020-12-31']
-            retrain = pd.concat([self.dataset, test]).drop_duplicates(keep=False)
-        else:
-            retrain, test = train_test_split(self.dataset,
-                                             test_size=self.user_input_params["test_set_size_percentage"] * 0.01,
-                                             random_state=42, shuffle=False)
+        prefix = '/temp/' if intermediate else ''
+        # read the trials only once from the storage
+        best_trial = self.get_best_trial() if best_trial is None else best_trial
+        if n_finished_trials is None:
+            n_finished_trials = len(self.study.get_trials(deepcopy=False)) - self.n_transferred_trials
+        model_filename = 'unfitted_model_trial' + str(best_trial.number) if model_filename is None else model_filename
+        # the dataset of the best trial, as the trials might have run in other processes or on other featuresets
+        self.dataset = _model_functions.load_model(path=self.save_path, filename=prefix + model_filename)\
+            .attach_dataset(datasets=self.datasets)
+        retrain, test = self.get_split_plan().get_retrain_retest(df=self.dataset)
         start_process_time = time.process_time()
         start_realclock_time = time.time()
-        final_model = _model_functions.load_retrain_model(
-            path=self.save_path, filename=prefix + 'unfitted_model_trial' + str(self.study.best_trial.number),
-            retrain=retrain, early_stopping_point=self.early_stopping_point)
-        if len(self.study.trials) == self.user_input_params["n_trials"] and self.user_input_params["save_final_model"]:
-            final_model.save_model(path=self.save_path, filename='final_retrained_model')
-        y_pred_retrain = final_model.predict(X_in=retrain)[0]
+        # the phase times in the runtime overview are accumulated over the refitting cycles like the total times
+        test_phase_timer = phase_timer.PhaseTimer()
+        self.early_stopping_point = best_trial.user_attrs.get('early_stopping_point')
+        with test_phase_timer.phase('load_retrain'):
+            final_model = _model_functions.load_retrain_model(
+                path=self.save_path, filename=prefix + model_filename, retrain=retrain,
+                early_stopping_point=self.early_stopping_point)
+        if not intermediate and self.user_input_params["save_final_model"]:
+            with test_phase_timer.phase('save_model'):
+                final_model.save_model(path=self.save_path, filename='final_retrained_model')
+        with test_phase_timer.phase('predict_retrain'):
+            y_pred_retrain = final_model.predict(X_in=retrain)[0]
         final_model.var_artifical = np.quantile(
             retrain[final_model.target_column][-len(final_model.prediction):] - y_pred_retrain, 0.68) ** 2
         final_results = pd.DataFrame(index=range(0, self.dataset.shape[0]))
@@ -360,6 +1185,7 @@ class OptunaOptim:
         final_results.at[0:len(test) - 1, 'y_true_test'] = test[self.target_column].values.flatten()
         feature_importance = pd.DataFrame(index=range(0, 0))
         for count, period in enumerate(self.user_input_params["periodical_refit_cycles"]):
+            test_phase_timer.start('refit_predict')
             test_len = test.shape[0]
             if hasattr(final_model, 'sequential'):
                 test = self.dataset.tail(len(test) + final_model.seq_length)
@@ -418,27 +1244,28 @@ class OptunaOptim:
                         y_pred_test_var = np.reshape(np.array(y_pred_test_var), (-1, 2))
                     else:
                         y_pred_test_var = np.array(y_pred_test_var).flatten()
+            test_phase_timer.stop('refit_predict')
 
-            no_trials = len(self.study.trials) - 1 \
-                if (self.user_input_params["intermediate_results_interval"] is not None) and \
-                   (len(self.study.trials) % self.user_input_params["intermediate_results_interval"] != 0) \
-                else len(self.study.trials)
-            self.write_runtime_csv(dict_runtime={'Trial': 'retraining_after_' + str(no_trials) + '_trials',
+            self.write_runtime_csv(dict_runtime={'Trial': 'retraining_after_' + str(n_finished_trials) + '_trials',
                                                  'refitting_cycle': period,
                                                  'process_time_s': time.process_time() - start_process_time,
                                                  'real_time_s': time.time() - start_realclock_time,
-                                                 'params': self.study.best_trial.params, 'note': 'successful'})
+                                                 'params': best_trial.params, 'note': 'successful',
+                                                 **test_phase_timer.get_runtime_columns()})
 
             # Evaluate and save results
             if 'lstm' in self.current_model_name:
                 test = self.dataset.tail(test_len)
+            test_phase_timer.start('metrics')
             eval_scores = eval_metrics.get_evaluation_report(y_true=test[self.target_column], y_pred=y_pred_test,
                                                              prefix='test_refitting_period_' + str(period) + '_',
                                                              current_model_name=self.current_model_name)
 
+            test_phase_timer.stop('metrics')
             feat_import_df = None
             if self.current_model_name in ['ard', 'bayesridge', 'elasticnet', 'lasso', 'ridge', 'xgboost']:
-                feat_import_df = self.get_feature_importance(model=model, period=period)
+                with test_phase_timer.phase('feature_importance'):
+                    feat_import_df = self.get_feature_importance(model=model, period=period)
             feature_importance = pd.concat([feature_importance, feat_import_df], axis=1)
 
             print('## Results on test set with refitting period: ' + str(period) + ' ##')
@@ -464,15 +1291,15 @@ class OptunaOptim:
             else:
                 final_eval_scores = {**final_eval_scores, **eval_scores}
 
-        if len(self.study.trials) == self.user_input_params["n_trials"]:
+        if not intermediate:
             results_filename = 'final_model_test_results.csv'
             feat_import_filename = 'final_model_feature_importances.csv'
         else:
-            results_filename = '/temp/intermediate_after_' + str(len(self.study.trials) - 1) + '_test_results.csv'
+            results_filename = '/temp/intermediate_after_' + str(n_finished_trials) + '_test_results.csv'
             feat_import_filename = \
-                '/temp/intermediate_after_' + str(len(self.study.trials) - 1) + '_feat_importances.csv'
+                '/temp/intermediate_after_' + str(n_finished_trials) + '_feat_importances.csv'
             shutil.copyfile(self.save_path + self.current_model_name + '_runtime_overview.csv',
-                            self.save_path + '/temp/intermediate_after_' + str(len(self.study.trials) - 1) + '_' +
+                            self.save_path + '/temp/intermediate_after_' + str(n_finished_trials) + '_' +
                             self.current_model_name + '_runtime_overview.csv', )
         final_results.to_csv(self.save_path + results_filename,
                              sep=',', decimal='.', float_format='%.10f', index=False)
@@ -509,44 +1336,301 @@ class OptunaOptim:
         Function to run whole optuna optimization for one model, dataset and datasplit
         :return: overall results
         """
+        self.setup_study()
+        self.optimize(n_trials=self.user_input_params["n_trials"])
+        return self.finalize()
+
+    def setup_study(self):
+        """
+        Create the study of the optimization or reattach to the study of an interrupted run
+        """
         helper_functions.set_all_seeds()
-        overall_results = {}
         print("## Starting Optimization")
         self.save_path = self.base_path + "/"
         if not os.path.exists(self.save_path):
             os.makedirs(self.save_path)
         # Create a new study
-        self.study = self.create_new_study()
-        self.current_best_val_result = None
-        # Start optimization run
-        self.study.optimize(
-            lambda trial: self.objective(trial=trial),
-            n_trials=self.user_input_params["n_trials"]
-        )
+        if self.resume_path is None:
+            self.study = self.create_new_study()
+            self.current_best_val_result = None
+        else:
+            self.study = self.resume_study()
+        if self.user_input_params["study_timeout"] is not None:
+            self.study_deadline = time.time() + self.user_input_params["study_timeout"]
+
+    def optimize(self, n_trials: int):
+        """
+        Run trials until n_trials trials of this run exist. Can be called repeatedly with an increasing number of
+        trials, e.g. to race several studies against each other, see
+        :obj:`~ForeTiS.optimization.model_racing.run_racing`.
+        :param n_trials: number of trials of this run after the optimization
+        """
+        self.n_trials = n_trials
+        if self.get_n_remaining_trials() <= 0:
+            print('All ' + str(self.n_trials) + ' trials already exist')
+        elif self.user_input_params["n_jobs"] > 1:
+            self.run_parallel_trials()
+        else:
+            self.study.optimize(
+                lambda trial: self.objective(trial=trial),
+                n_trials=self.get_n_remaining_trials(),
+                # the time budget started with the study
+                timeout=None if self.study_deadline is None else max(self.study_deadline - time.time(), 0),
+                callbacks=[self.get_max_trials_callback()]
+            )
+
+    def finalize(self) -> dict:
+        """
+        Finish the optimization: evaluate the best trial on the test set and keep its files
+        :return: overall results
+        """
+        overall_results = {}
+        self.shutdown_fold_workers()
+        # the intermediate results are written to the temp directory, which is removed below
+        self.wait_for_intermediate_results()
         helper_functions.set_all_seeds()
         # Calculate runtime metrics after finishing optimization
         runtime_metrics = self.calc_runtime_stats()
         # Print statistics after run
         print("## Optuna Study finished ##")
         print("Study statistics: ")
-        print("  Finished trials: ", len(self.study.trials))
-        print("  Pruned trials: ", len(self.study.get_trials(states=(optuna.trial.TrialState.PRUNED,))))
-        print("  Completed trials: ", len(self.study.get_trials(states=(optuna.trial.TrialState.COMPLETE,))))
-        print("  Best Trial: ", self.study.best_trial.number)
-        print("  Value: ", self.study.best_trial.value)
+        finished_trials = self.study.get_trials(deepcopy=False)
+        best_trial = self.get_best_trial()
+        print("  Finished trials: ", len(finished_trials) - self.n_transferred_trials)
+        if self.n_transferred_trials > 0:
+            print("  Transferred trials of previous runs: ", self.n_transferred_trials)
+        print("  Pruned trials: ",
+              len([trial for trial in finished_trials if trial.state == optuna.trial.TrialState.PRUNED]))
+        print("  Completed trials: ",
+              len([trial for trial in finished_trials if trial.state == optuna.trial.TrialState.COMPLETE])
+              - self.n_transferred_trials)
+        if self.user_input_params["multi_objective"]:
+            print("  Trials on the Pareto front: ", len(self.get_pareto_front_trials()))
+        print("  Best Trial: ", best_trial.number)
+        print("  Value: ", self.get_objective_values(trial=best_trial))
         print("  Params: ")
-        for key, value in self.study.best_trial.params.items():
+        for key, value in best_trial.params.items():
             print("    {}: {}".format(key, value))
 
+        self.add_in_sample_predictions(best_trial=best_trial)
         # Move validation results and models of best trial
-        files_to_keep = glob.glob(self.save_path + 'temp/' + '*trial' + str(self.study.best_trial.number) + '*')
+        files_to_keep = glob.glob(self.save_path + 'temp/' + '*trial' + str(best_trial.number) + '*')
         for file in files_to_keep:
             shutil.copyfile(file, self.save_path + file.split('/')[-1])
         shutil.rmtree(self.save_path + 'temp/')
+        if self.user_input_params["export_validation_csv"]:
+            export_validation_results_csv(
+                npz_path=self.save_path + 'validation_results_trial' + str(best_trial.number) + '.npz')
 
         # Retrain on full train + val data with best hyperparams and apply on test
         final_eval_scores = self.generate_results_on_test()
-        overall_results['Test'] = {'best_params': self.study.best_trial.params, 'eval_metrics': final_eval_scores,
+        overall_results['Test'] = {'best_params': best_trial.params, 'eval_metrics': final_eval_scores,
                                    'runtime_metrics': runtime_metrics}
 
         return overall_results
+
+    def add_in_sample_predictions(self, best_trial: optuna.trial.FrozenTrial):
+        """
+        Add the in-sample predictions on the train set of each fold to the validation results of the best trial.
+        They are only needed for the best trial, so the folds are evaluated once more at the end instead of predicting
+        the train set in every fold of every trial.
+        The folds are evaluated like the ones of a trial, so the time budget and the memory limit apply as well.
+        The in-sample predictions are optional, so a failure only prints a warning.
+        :param best_trial: best trial of the optimization
+        """
+        helper_functions.set_all_seeds()
+        npz_path = self.save_path + 'temp/validation_results_trial' + str(best_trial.number) + '.npz'
+        try:
+            model = _model_functions.load_model(path=self.save_path + 'temp/',
+                                                filename='unfitted_model_trial' + str(best_trial.number))
+            self.dataset = model.attach_dataset(datasets=self.datasets)
+            self.adjust_datasplit()
+            model_snapshot = model.get_snapshot()
+            validation_results = {}
+            if os.path.exists(npz_path):
+                with np.load(npz_path) as saved_results:
+                    validation_results = {column: saved_results[column] for column in saved_results.files}
+            fold_results = self.get_fold_results_of_stage(trial=None, model_snapshot=model_snapshot,
+                                                          folds=self.get_split_plan().folds,
+                                                          trial_start_time=time.time(), predict_train=True)
+            for fold, fold_result in enumerate(fold_results):
+                if 'y_pred_train' not in fold_result:
+                    print('In-sample predictions of fold ' + str(fold) + ' failed')
+                    continue
+                validation_results['fold_' + str(fold) + '_train_pred'] = fold_result['y_pred_train']
+            np.savez(npz_path, **validation_results)
+        except Exception as exc:
+            print(traceback.format_exc())
+            print('In-sample predictions of the best trial ' + str(best_trial.number) + ' failed: ' + str(exc))
+        finally:
+            self.shutdown_fold_workers()
+
+    def run_parallel_trials(self):
+        """
+        Run the trials of the study in a pool of worker processes sharing the study storage.
+        The remaining trials are split among the workers, as only finished trials are counted and the workers would
+        otherwise start more trials than needed. Trials not finished, e.g. failed ones, are run in a further round.
+        """
+        # write the header before the workers append their runtime info
+        self.write_runtime_csv()
+        mp_context = multiprocessing.get_context('spawn')
+        n_remaining_trials = self.get_n_remaining_trials()
+        while n_remaining_trials > 0 and not self.is_time_budget_exhausted():
+            n_workers = min(self.user_input_params["n_jobs"], n_remaining_trials)
+            with concurrent.futures.ProcessPoolExecutor(max_workers=n_workers, mp_context=mp_context) as executor:
+                workers = [executor.submit(_optimize_in_worker, optuna_optim=self, worker_id=worker_id,
+                                           n_trials=n_remaining_trials // n_workers +
+                                           int(worker_id < n_remaining_trials % n_workers))
+                           for worker_id in range(n_workers)]
+                for worker in concurrent.futures.as_completed(workers):
+                    # raise exceptions of the workers
+                    worker.result()
+            self.study = optuna.load_study(study_name=self.study_name, storage=self.get_storage(),
+                                           sampler=self.get_sampler(seed=42), pruner=self.get_pruner())
+            if self.get_n_remaining_trials() >= n_remaining_trials:
+                # no trial finished in this round
+                break
+            n_remaining_trials = self.get_n_remaining_trials()
+
+
+def _optimize_in_worker(optuna_optim: OptunaOptim, worker_id: int, n_trials: int):
+    """
+    Run trials of a shared study in a worker process until the specified number of trials is reached in total
+    :param optuna_optim: OptunaOptim instance of the parent process
+    :param worker_id: id of the worker, used for seeding the sampler
+    :param n_trials: maximal number of trials of this worker
+    """
+    helper_functions.set_all_seeds()
+    optuna_optim.study = optuna.load_study(study_name=optuna_optim.study_name, storage=optuna_optim.get_storage(),
+                                           sampler=optuna_optim.get_sampler(seed=42 + worker_id),
+                                           pruner=optuna_optim.get_pruner())
+    optuna_optim.study.optimize(
+        lambda trial: optuna_optim.objective(trial=trial),
+        n_trials=n_trials,
+        # the time budget started with the study in the parent process
+        timeout=None if optuna_optim.study_deadline is None else max(optuna_optim.study_deadline - time.time(), 0),
+        callbacks=[optuna_optim.get_max_trials_callback()]
+    )
+    optuna_optim.shutdown_fold_workers()
+    optuna_optim.wait_for_intermediate_results()
+
+
+def _generate_intermediate_results(optuna_optim: OptunaOptim, best_trial: optuna.trial.FrozenTrial,
+                                   n_finished_trials: int, model_filename: str):
+    """
+    Generate intermediate results on the test set in a background worker process and delete the model snapshot
+    :param optuna_optim: OptunaOptim instance of the parent process
+    :param best_trial: best trial at the time the intermediate results were requested
+    :param n_finished_trials: number of trials of the run finished at that time
+    :param model_filename: filename of the snapshot of the unfitted model of the best trial in the temp directory
+    """
+    try:
+        optuna_optim.generate_results_on_test(intermediate=True, best_trial=best_trial,
+                                              n_finished_trials=n_finished_trials, model_filename=model_filename)
+    finally:
+        os.remove(optuna_optim.save_path + 'temp/' + model_filename)
+
+
+def export_validation_results_csv(npz_path: str):
+    """
+    Export validation results stored as npz to a CSV file next to it, with one column per array and the metrics in
+    the first row. Shorter columns are filled with NaN.
+    :param npz_path: path of the npz file with the validation results
+    """
+    with np.load(npz_path) as validation_results:
+        validation_df = pd.DataFrame({column: pd.Series(validation_results[column])
+                                      for column in validation_results.files})
+    validation_df.to_csv(npz_path[:-len('.npz')] + '.csv', sep=',', decimal='.', float_format='%.10f', index=False)
+
+
+def evaluate_fold(model_snapshot: bytes, datasets, fold_positions: tuple, target_column: str,
+                  measure_latency: bool = False, epoch_report_trial: optuna.trial.Trial = None,
+                  warm_start_model: _base_model.BaseModel = None, return_model: bool = False,
+                  predict_train: bool = False) -> dict:
+    """
+    Run the train and validation loop of an unfitted model for one fold.
+    Module-level function, so that folds can also be evaluated in worker processes.
+    :param model_snapshot: snapshot of the unfitted model, a new copy is fitted on the train set
+    :param datasets: all datasets that are available, the snapshot does not contain the dataset of the model
+    :param fold_positions: positions of the train and validation set of the fold in the dataset of the model
+    :param target_column: target column for which predictions shall be made
+    :param measure_latency: whether to measure the inference cost of the fitted model, i.e. the per-row prediction
+        latency with an additional, timed prediction of the validation set and the size of the model
+    :param epoch_report_trial: trial to report the validation loss of each epoch to for pruning (PyTorch models)
+    :param warm_start_model: model fitted on the previous fold to start the training from, None to train from scratch
+    :param return_model: whether to add the fitted model to the result, e.g. to warm-start the next fold
+    :param predict_train: whether to add the in-sample predictions on the train set, which is costly, e.g. for
+        Bayesian models predicting with several forward passes
+    :return: dictionary with the predictions and true values, the early stopping point and the inference cost of
+             the fitted model as well as the error message if the training failed and the pruning message if the
+             trial was pruned during the training
+    """
+    fold_phase_timer = phase_timer.PhaseTimer()
+    fold_result = {'training_error': None, 'pruned': None, 'early_stopping_point': None, 'warm_started': False,
+                   'phase_times': fold_phase_timer.durations, 'peak_rss_mb': None, 'predict_latency_ms_per_row': None,
+                   'model_size_mb': None}
+    # peak memory of the process while evaluating this fold, the process might have evaluated other folds before
+    memory_monitor.reset_peak_rss()
+    # fresh copy of the unfitted model for each fold to prevent information leak between folds
+    with fold_phase_timer.phase('clone'):
+        model = _model_functions.load_model_from_snapshot(snapshot=model_snapshot)
+        dataset = model.attach_dataset(datasets=datasets)
+    train, val = dataset.iloc[fold_positions[0]], dataset.iloc[fold_positions[1]]
+    if epoch_report_trial is not None and hasattr(model, 'report_epochs'):
+        model.optuna_trial = epoch_report_trial
+        model.report_epochs = True
+    try:
+        if warm_start_model is not None:
+            model.warm_start_from(previous_model=warm_start_model)
+            fold_result['warm_started'] = True
+        with fold_phase_timer.phase('fit_validate'):
+            y_pred = model.train_val_loop(train=train, val=val)[0]
+    except optuna.exceptions.TrialPruned as exc:
+        fold_result['pruned'] = str(exc)
+        return fold_result
+    except Exception as exc:
+        print(traceback.format_exc())
+        fold_result['training_error'] = str(exc)
+        return fold_result
+
+    if hasattr(model, 'early_stopping_point'):
+        fold_result['early_stopping_point'] = \
+            model.early_stopping_point if model.early_stopping_point is not None else model.n_epochs
+
+    if len(y_pred) == (len(val) - 1):
+        # might happen if batch size leads to a last batch with one sample which will be dropped then
+        print('val has one element less than y_true (e.g. due to batch size) -> drop last element')
+        val = val[:-1]
+    fold_result['y_pred'] = y_pred.flatten()
+    fold_result['y_true'] = val[target_column].values.reshape(-1)
+    if measure_latency:
+        with fold_phase_timer.phase('predict_val'):
+            n_predicted_rows = len(model.predict(X_in=val)[0])
+        fold_result['predict_latency_ms_per_row'] = \
+            1000 * fold_phase_timer.durations['predict_val'] / max(n_predicted_rows, 1)
+    if predict_train:
+        # the train predictions of lstm models are shorter than the train set due to the sequence length
+        with fold_phase_timer.phase('predict_train'):
+            fold_result['y_pred_train'] = model.predict(X_in=train)[0].flatten()
+    if measure_latency:
+        try:
+            fold_result['model_size_mb'] = model.get_model_size_mb()
+        except Exception as exc:
+            # the size is only reported, so a model that can not be serialized does not fail the fold
+            print('Size of the model could not be measured: ' + str(exc))
+    fold_result['peak_rss_mb'] = memory_monitor.get_peak_rss_mb()
+    if return_model:
+        fold_result['model'] = model
+    return fold_result
+
+
+def dominates(values: list, other_values: list) -> bool:
+    """
+    Check if the objective values of a trial dominate the ones of another trial, i.e. are at least as good in all
+    objectives and better in one of them (all objectives are minimized)
+    :param values: objective values of the trial
+    :param other_values: objective values of the other trial
+    :return: bool reflecting if the values dominate the other values
+    """
+    return all(value <= other_value for value, other_value in zip(values, other_values)) and \
+        any(value < other_value for value, other_value in zip(values, other_values))
@@ -0,0 +1,117 @@
+import os
+import time
+import multiprocessing
+import concurrent.futures
+
+from ..model import _model_registry
+
+# environment variables limiting the threads of numpy, torch, xgboost and tensorflow in a worker process
+_THREAD_ENV_VARIABLES = ['OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'NUMEXPR_NUM_THREADS',
+                         'TF_NUM_INTRAOP_THREADS']
+
+
+class StudyJob:
+    """
+    Study of one model and featureset with its estimated resource demand.
+
+    ** Attributes **
+
+        - model_name (*str*): name of the model to optimize
+        - featureset (*str*): featureset to optimize the model on
+        - cost (*float*): estimated relative runtime of the study
+        - threads (*int*): number of cores the study uses
+        - memory_mb (*float*): estimated memory of the study in MB
+
+    :param model_name: name of the model to optimize
+    :param featureset: featureset to optimize the model on
+    :param featureset_size_mb: size of the featureset in MB
+    :param n_jobs: number of processes running trials of the study in parallel
+    :param fold_jobs: number of processes evaluating the folds of a trial in parallel
+    """
+    def __init__(self, model_name: str, featureset: str, featureset_size_mb: float, n_jobs: int, fold_jobs: int):
+        resources = _model_registry.get_model_resources(model_name=model_name)
+        self.model_name = model_name
+        self.featureset = featureset
+        self.cost = resources['cost']
+        self.threads = resources['threads'] * n_jobs * fold_jobs
+        self.memory_mb = resources['memory_factor'] * featureset_size_mb * n_jobs * fold_jobs
+
+
+def get_study_jobs(models: list, featuresets: list, featureset_sizes_mb: dict, n_jobs: int, fold_jobs: int) -> list:
+    """
+    Get the jobs for all combinations of models and featuresets, longest jobs first.
+    Starting the long jobs first prevents a long job from running alone at the end of a sweep.
+    :param models: models to optimize
+    :param featuresets: featuresets to optimize the models on
+    :param featureset_sizes_mb: size of each featureset in MB
+    :param n_jobs: number of processes running trials of each study in parallel
+    :param fold_jobs: number of processes evaluating the folds of a trial in parallel
+    :return: list of jobs sorted by decreasing cost
+    """
+    jobs = [StudyJob(model_name=model_name, featureset=featureset, featureset_size_mb=featureset_sizes_mb[featureset],
+                     n_jobs=n_jobs, fold_jobs=fold_jobs) for model_name in models for featureset in featuresets]
+    return sorted(jobs, key=lambda job: job.cost, reverse=True)
+
+
+def run_study_jobs(jobs: list, run_job, n_cores: int, max_memory_gb: float = None) -> dict:
+    """
+    Run the jobs concurrently, each in its own process with its threads limited to the demand of the job.
+    A job is started as soon as enough cores and memory are free. Jobs that do not fit are skipped for smaller ones,
+    a job exceeding the limits on its own is run if nothing else is running.
+    :param jobs: jobs to run in the order of their priority
+    :param run_job: module-level function running a job, called with model_name and featureset
+    :param n_cores: number of cores to use
+    :param max_memory_gb: memory to use in GB, not limited if None
+    :return: results of the jobs by model and featureset
+    """
+    max_memory_mb = None if max_memory_gb is None else max_memory_gb * 1024
+    pending_jobs = list(jobs)
+    running_jobs = {}
+    results = {}
+    start_time = time.time()
+    while len(pending_jobs) > 0 or len(running_jobs) > 0:
+        free_cores = n_cores - sum(job.threads for job in running_jobs.values())
+        free_memory_mb = None if max_memory_mb is None else \
+            max_memory_mb - sum(job.memory_mb for job in running_jobs.values())
+        for job in list(pending_jobs):
+            fits = job.threads <= free_cores and (free_memory_mb is None or job.memory_mb <= free_memory_mb)
+            if not fits and len(running_jobs) > 0:
+                continue
+            pending_jobs.remove(job)
+            running_jobs[submit_job(job=job, run_job=run_job, n_threads=min(job.threads, n_cores))] = job
+            free_cores -= job.threads
+            if free_memory_mb is not None:
+                free_memory_mb -= job.memory_mb
+        finished, _ = concurrent.futures.wait(running_jobs.keys(), return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in finished:
+            job = running_jobs.pop(future)
+            results.setdefault(job.model_name, {})[job.featureset] = future.result()
+            print('### Finished job for model ' + job.model_name + ' and featureset ' + job.featureset + ' after ' +
+                  '%.1f' % (time.time() - start_time) + ' s, ' + str(len(pending_jobs)) + ' jobs pending ###')
+    return results
+
+
+def submit_job(job: StudyJob, run_job, n_threads: int) -> concurrent.futures.Future:
+    """
+    Start a job in a new process, which inherits the thread limits from the environment at its start
+    :param job: job to start
+    :param run_job: module-level function running a job
+    :param n_threads: number of threads the process may use
+    :return: future of the result of the job
+    """
+    previous_values = {variable: os.environ.get(variable) for variable in _THREAD_ENV_VARIABLES}
+    os.environ.update({variable: str(n_threads) for variable in _THREAD_ENV_VARIABLES})
+    try:
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=1,
+                                                          mp_context=multiprocessing.get_context('spawn'))
+        future = executor.submit(run_job, model_name=job.model_name, featureset=job.featureset)
+        # the process is started by submit, so the environment can be restored afterwards
+    finally:
+        for variable, value in previous_values.items():
+            if value is None:
+                del os.environ[variable]
+            else:
+                os.environ[variable] = value
+    # the process terminates once the job is finished
+    executor.shutdown(wait=False)
+    return future
@@ -0,0 +1,91 @@
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+
+# entries of the fold results that are stored, the remaining ones are restored with their defaults
+_ARRAY_ENTRIES = ['y_pred', 'y_true']
+_SCALAR_ENTRIES = ['early_stopping_point', 'warm_started', 'predict_latency_ms_per_row', 'model_size_mb']
+
+
+class TrialCache:
+    """
+    Persistent content-addressed cache of the results of evaluated folds, shared by all runs using the same
+    cache directory. Each entry is addressed by the hash of everything determining the result of a fold,
+    see get_key(), so that entries of changed datasets, splits or settings are never hit.
+
+    ** Attributes **
+
+        - cache_dir (*str*): directory containing the entries, one npz file per fold result
+
+    :param cache_dir: directory containing the entries, created if it does not exist
+    """
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def get_key(**key_fields) -> str:
+        """
+        Get the address of an entry
+        :param key_fields: json serializable fields determining the result of a fold
+        :return: hash of the fields
+        """
+        return hashlib.sha256(json.dumps(key_fields, sort_keys=True, default=str).encode()).hexdigest()
+
+    def get_path(self, key: str) -> str:
+        """
+        Get the path of an entry, the entries are distributed over subdirectories to keep the directories small
+        :param key: address of the entry
+        :return: path of the npz file of the entry
+        """
+        return os.path.join(self.cache_dir, key[:2], key + '.npz')
+
+    def load(self, key: str) -> dict:
+        """
+        Load the result of a fold
+        :param key: address of the entry
+        :return: result of the fold in the format of evaluate_fold(), None if there is no entry
+        """
+        if not os.path.exists(self.get_path(key=key)):
+            return None
+        with np.load(self.get_path(key=key)) as entry:
+            fold_result = {'training_error': None, 'pruned': None, 'phase_times': {}, 'peak_rss_mb': None,
+                           'cached': True}
+            for name in _ARRAY_ENTRIES:
+                fold_result[name] = entry[name]
+            for name in _SCALAR_ENTRIES:
+                value = entry[name].item()
+                # missing values are stored as nan
+                fold_result[name] = None if isinstance(value, float) and np.isnan(value) else value
+        return fold_result
+
+    def store(self, key: str, fold_result: dict):
+        """
+        Store the result of a successfully evaluated fold. The entry is written to a temporary file first, so that
+        parallel processes never read a partially written entry.
+        :param key: address of the entry
+        :param fold_result: result of the fold, see evaluate_fold()
+        """
+        path = self.get_path(key=key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = {name: fold_result[name] for name in _ARRAY_ENTRIES}
+        for name in _SCALAR_ENTRIES:
+            entry[name] = np.nan if fold_result[name] is None else fold_result[name]
+        temp_path = path + '.' + str(os.getpid()) + '.tmp'
+        with open(temp_path, 'wb') as entry_file:
+            np.savez(entry_file, **entry)
+        os.replace(temp_path, path)
+
+
+def get_dataset_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Get a fingerprint of the content of a featureset, i.e. of its values, index and columns
+    :param df: featureset
+    :return: hash of the featureset
+    """
+    hasher = hashlib.sha256()
+    hasher.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    hasher.update(json.dumps([str(column) for column in df.columns]).encode())
+    return hasher.hexdigest()
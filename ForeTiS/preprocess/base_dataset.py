@@ -7,7 +7,9 @@ import re
 from sklearn.model_selection import train_test_split
 
 from .raw_data_functions import custom_resampler, drop_columns, get_one_hot_encoded_df, impute_dataset_train_test
+from .data_source import DataSource, get_data_source
 from . import FeatureAdder
+from . import shared_featureset
 
 
 class Dataset:
@@ -34,6 +36,8 @@ class Dataset:
         - holiday_public_column (*str*): the column name containing the public holidays
         - special_days (*list<str>*): the special days in your data
         - resample_weekly (*bool*): whether to resample weekly or not
+        - data_source (*obj:`~ForeTiS.preprocess.data_source.DataSource`*): source of the raw data
+        - shared_featuresets (*list<dict>*): descriptions of the featuresets in shared memory, None if not shared
 
     :param data_dir: data directory where the phenotype and genotype matrix are stored
     :param data: the dataset that you want to use
@@ -47,12 +51,14 @@ class Dataset:
     :param correlation_number: the number of with the focus product correlating products
     :param correlation_method: the used method to calculate the correlations
     :param config: the information from dataset_specific_config.ini
+    :param data_source: source of the raw data, defaults to the source specified in dataset_specific_config.ini
     """
 
     def __init__(self, data_dir: str, data: str, test_set_size_percentage: int, target_column: str,
                  windowsize_current_statistics: int, windowsize_lagged_statistics: int, seasonal_lags: list,
                  cyclic_encoding: bool = False, imputation_method: str = 'None', correlation_number: int = None,
-                 correlation_method: str = None, config: configparser.ConfigParser = None):
+                 correlation_method: str = None, config: configparser.ConfigParser = None,
+                 data_source: DataSource = None):
         self.target_column = target_column
         self.data_dir = data_dir
         self.data = data
@@ -72,7 +78,15 @@ class Dataset:
         self.holiday_public_column = config[data]['holiday_public_column']
         self.special_days = config[data]['special_days'].replace(" ", "").replace("_", " ").split(',')
         self.resample_weekly = config[data].getboolean('resample_weekly')
-        features_weather_regex = config[data]['features_weather_regex'].replace(" ", "").split(',')
+        self.features_weather_regex = config[data]['features_weather_regex'].replace(" ", "").split(',')
+        if 'cols_to_condense' in config[data]:
+            self.cols_to_condense = config[data]['cols_to_condense'].replace(" ", "").split(',')
+            self.condensed_col_name = config[data]['condensed_col_name']
+        else:
+            self.cols_to_condense = []
+        self.data_source = data_source if data_source is not None else \
+            get_data_source(data_dir=data_dir, data=data, config=config)
+        self.raw_cache_path = os.path.join(data_dir, data + '_raw.h5')
 
         #  check if data is already preprocessed. If not, preprocess the data
         if os.path.exists(os.path.join(data_dir, data + '.h5')):
@@ -88,85 +102,266 @@ class Dataset:
             else:
                 raise Exception('Dataset was already preprocessed, but with another target column. '
                                 'Please check target column again.')
+            if self.data_source.supports_incremental and os.path.exists(self.raw_cache_path):
+                datasets = self.add_new_rows(datasets=datasets, test_set_size_percentage=test_set_size_percentage,
+                                             imputation_method=imputation_method)
         else:
             print('---Start preprocessing data---')
 
             # load raw data
             dataset_raw = self.load_raw_data(data_dir=data_dir, data=data)
-
-            # sum up the turnovers if the data is from the API
-            if self.group == 'API':
-                if 'turnover' in self.target_column:
-                    turnovers = []
-                    for column in dataset_raw.columns:
-                        if 'turnover' in column:
-                            turnovers.append(column)
-                    dataset_raw['total_turnover'] = dataset_raw[turnovers].sum(axis=1)
-                    dataset_raw.drop(turnovers, axis=1, inplace=True)
-                elif 'amount' in self.target_column:
-                    self.correlations = \
-                        self.get_corr(df=dataset_raw, test_set_size_percentage=test_set_size_percentage).index.tolist()
-
-            dataset_raw = dataset_raw.asfreq('D')
-
-            if 'cols_to_condense' in config[data]:
-                cols_to_condense = config[data]['cols_to_condense'].replace(" ", "").split(',')
-                condensed_col_name = config[data]['condensed_col_name']
-                dataset_raw[condensed_col_name] = 0
-                for col in cols_to_condense:
-                    dataset_raw[condensed_col_name] += dataset_raw[col]
-                drop_columns(df=dataset_raw, columns=cols_to_condense)
-
-            searchfor = features_weather_regex
-            features_weather = dataset_raw.filter(regex='|'.join(searchfor), axis=1).columns.tolist()
-            self.features_holidays = [self.holiday_school_column] + [self.holiday_public_column]
-            self.features = [self.target_column] + features_weather + self.features_holidays
-            self.features_weather_sales = [self.target_column] + features_weather
-            self.features_sales = [self.target_column]
-            if hasattr(self, 'correlations'):
-                self.features += self.correlations
-                self.features_weather_sales += self.correlations
-                self.features_sales += self.correlations
-
-            # drop sales columns that are not target column and not useful columns
-            dataset_raw = self.drop_non_target_useless_columns(df=dataset_raw)
-
-            if self.imputation:
-                dataset_raw = impute_dataset_train_test(df=dataset_raw,
-                                                        test_set_size_percentage=test_set_size_percentage,
-                                                        imputation_method=imputation_method)
-
-            # set specific columns to datatype string
-            self.set_dtypes(df=dataset_raw)
-
-            # fill nans that are either no sale or no holiday
-            if self.group == 'API':
-                self.fill_nans_raw_data(df=dataset_raw)
+            dataset_raw = self.select_raw_columns(df=dataset_raw, test_set_size_percentage=test_set_size_percentage)
+            if self.data_source.supports_incremental:
+                # keep the raw history to only compute the features of new rows in later runs
+                dataset_raw.to_hdf(self.raw_cache_path, key='raw')
+            dataset_raw = self.clean_raw_data(df=dataset_raw, test_set_size_percentage=test_set_size_percentage,
+                                              imputation_method=imputation_method)
 
             # add features, resample, and preprocess
             datasets = self.featureadding_and_resampling(df=dataset_raw)
+            self.data_source.commit_high_water_mark()
             print('---Data preprocessed---')
 
         self.datasets = datasets
+        self.shared_featuresets = None
+        self._shared_memory_blocks = []
 
-    def load_raw_data(self, data_dir: str, data: str) -> pd.DataFrame:
+    def __getstate__(self) -> dict:
+        """
+        Pickle the featuresets in shared memory as references to their blocks, so that worker processes do not get
+        a copy of them. The names of the featuresets are kept, as pandas does not pickle them.
         """
-        Load raw datasets
+        state = self.__dict__.copy()
+        state['_shared_memory_blocks'] = []
+        if self.shared_featuresets is not None:
+            state['datasets'] = None
+        else:
+            state['dataset_names'] = [dataset.name for dataset in self.datasets]
+        return state
+
+    def __setstate__(self, state: dict):
+        """
+        Attach to the featuresets in shared memory or restore the names of the copied featuresets
+        """
+        dataset_names = state.pop('dataset_names', None)
+        self.__dict__.update(state)
+        if getattr(self, 'shared_featuresets', None) is not None:
+            self.datasets = [shared_featureset.attach_featureset(description=description)
+                             for description in self.shared_featuresets]
+        elif dataset_names is not None:
+            for dataset, name in zip(self.datasets, dataset_names):
+                dataset.name = name
+
+    def share_memory(self):
+        """
+        Move the featuresets into shared memory, so that worker processes attach to them read-only instead of
+        getting a copy each. This process uses the read-only featuresets in shared memory as well.
+        """
+        if self.shared_featuresets is not None:
+            return
+        descriptions = []
+        datasets = []
+        for dataset in self.datasets:
+            block, description = shared_featureset.share_featureset(df=dataset)
+            shared_dataset = shared_featureset.get_featureset(block=block, description=description)
+            shared_featureset.register_featureset(block=block, df=shared_dataset)
+            self._shared_memory_blocks.append(block)
+            descriptions.append(description)
+            datasets.append(shared_dataset)
+        self.datasets = datasets
+        self.shared_featuresets = descriptions
+
+    def release_shared_memory(self):
+        """
+        Free the shared memory of the featuresets, only to be called by the process that called share_memory()
+        after all worker processes finished
+        """
+        for block in self._shared_memory_blocks:
+            shared_featureset.release_featureset(block=block, unlink=True)
+        self._shared_memory_blocks = []
+
+    def load_raw_data(self, data_dir: str, data: str, only_new_rows: bool = False) -> pd.DataFrame:
+        """
+        Load raw datasets from the data source. Only the columns needed for the preprocessing are loaded.
 
         :param data_dir: directory where the data is stored
         :param data: which dataset should be loaded
+        :param only_new_rows: whether to only load the rows added since the last run (if supported by the source)
 
         :return: list of datasets to use for optimization
         """
-        # load and name raw dataset
-        if self.datatype == 'american':
-            dataset_raw = pd.read_csv(os.path.join(data_dir, data + '.csv'), index_col=self.date_column)
-        elif self.datatype == 'german':
-            dataset_raw = pd.read_csv(os.path.join(data_dir, data + '.csv'), index_col=self.date_column,
-                                      sep=';', decimal=',')
-        dataset_raw.index = pd.to_datetime(dataset_raw.index, format='%Y-%m-%d')
+        columns = self.get_required_columns(available_columns=self.data_source.get_available_columns())
+        return self.data_source.load(columns=columns, only_new_rows=only_new_rows)
+
+    def get_required_columns(self, available_columns: list) -> list:
+        """
+        Get the columns of the raw data that are needed for the preprocessing
+
+        :param available_columns: all columns the data source provides
+
+        :return: list of the needed columns
+        """
+        required_columns = [self.target_column, self.holiday_school_column, self.holiday_public_column]
+        required_columns += [column for column in available_columns
+                             if re.search('|'.join(self.features_weather_regex), column)]
+        required_columns += self.cols_to_condense
+        if self.group == 'API':
+            if 'turnover' in self.target_column:
+                required_columns += [column for column in available_columns if 'turnover' in column]
+            elif 'amount' in self.target_column:
+                required_columns += self.correlations if hasattr(self, 'correlations') else \
+                    [column for column in available_columns if 'amount' in column]
+        return [column for column in dict.fromkeys(required_columns) if column in available_columns]
+
+    def select_raw_columns(self, df: pd.DataFrame, test_set_size_percentage: int) -> pd.DataFrame:
+        """
+        Condense the raw data to the target column and the features used for feature engineering
+
+        :param df: DataFrame with the raw data
+        :param test_set_size_percentage: the size of the test set in percentage
+
+        :return: DataFrame with the target column and raw features
+        """
+        # sum up the turnovers if the data is from the API
+        if self.group == 'API':
+            if 'turnover' in self.target_column:
+                turnovers = []
+                for column in df.columns:
+                    if 'turnover' in column:
+                        turnovers.append(column)
+                df['total_turnover'] = df[turnovers].sum(axis=1)
+                df.drop(turnovers, axis=1, inplace=True)
+            elif 'amount' in self.target_column and not hasattr(self, 'correlations'):
+                self.correlations = \
+                    self.get_corr(df=df, test_set_size_percentage=test_set_size_percentage).index.tolist()
+
+        df = df.asfreq('D')
+
+        if len(self.cols_to_condense) > 0:
+            df[self.condensed_col_name] = 0
+            for col in self.cols_to_condense:
+                df[self.condensed_col_name] += df[col]
+            drop_columns(df=df, columns=self.cols_to_condense)
+
+        self.set_feature_lists(columns=df.columns)
+
+        # drop sales columns that are not target column and not useful columns
+        return self.drop_non_target_useless_columns(df=df)
+
+    def set_feature_lists(self, columns: list):
+        """
+        Set the lists of features used for the feature engineering
+
+        :param columns: columns of the raw data
+        """
+        features_weather = [column for column in columns if re.search('|'.join(self.features_weather_regex), column)]
+        self.features_holidays = [self.holiday_school_column] + [self.holiday_public_column]
+        self.features = [self.target_column] + features_weather + self.features_holidays
+        self.features_weather_sales = [self.target_column] + features_weather
+        self.features_sales = [self.target_column]
+        if hasattr(self, 'correlations'):
+            self.features += self.correlations
+            self.features_weather_sales += self.correlations
+            self.features_sales += self.correlations
+
+    def clean_raw_data(self, df: pd.DataFrame, test_set_size_percentage: int, imputation_method: str) \
+            -> pd.DataFrame:
+        """
+        Impute the raw data if specified, set the data types and fill the nans
+
+        :param df: DataFrame with the target column and raw features
+        :param test_set_size_percentage: the size of the test set in percentage
+        :param imputation_method: the imputation method to use. Options are: 'mean' , 'knn' , 'iterative'
+
+        :return: cleaned DataFrame
+        """
+        if self.imputation:
+            df = impute_dataset_train_test(df=df, test_set_size_percentage=test_set_size_percentage,
+                                           imputation_method=imputation_method)
+
+        # set specific columns to datatype string
+        self.set_dtypes(df=df)
+
+        # fill nans that are either no sale or no holiday
+        if self.group == 'API':
+            self.fill_nans_raw_data(df=df)
+        return df
+
+    def add_new_rows(self, datasets: list, test_set_size_percentage: int, imputation_method: str) -> list:
+        """
+        Pull the rows added to the data source since the last run and append them to the preprocessed datasets.
+        The raw data is imputed as a whole, so that the new rows get the same imputation as with the full
+        preprocessing. The features are only computed for a window of raw history in front of the new rows that is
+        long enough for all statistical features instead of redoing the whole feature engineering.
+        Raises an Exception if the new rows do not provide all columns of the preprocessed datasets.
 
-        return dataset_raw
+        :param datasets: already preprocessed datasets
+        :param test_set_size_percentage: the size of the test set in percentage
+        :param imputation_method: the imputation method to use. Options are: 'mean' , 'knn' , 'iterative'
+
+        :return: updated datasets
+        """
+        history = pd.read_hdf(self.raw_cache_path, key='raw')
+        if self.group == 'API' and 'amount' in self.target_column:
+            self.set_feature_lists(columns=history.columns)
+            self.correlations = [column for column in history.columns if column not in self.features]
+        new_rows = self.load_raw_data(data_dir=self.data_dir, data=self.data, only_new_rows=True)
+        if new_rows.empty:
+            return datasets
+        print('---Adding ' + str(new_rows.shape[0]) + ' new rows to the preprocessed data---')
+        new_rows = self.select_raw_columns(df=new_rows, test_set_size_percentage=test_set_size_percentage)
+        missing_raw_columns = [column for column in history.columns if column not in new_rows.columns]
+        if len(missing_raw_columns) > 0:
+            raise Exception('The new rows of the data source miss the columns ' + str(missing_raw_columns) +
+                            ' of the preprocessed data. Please delete ' + self.data + '.h5 to preprocess again.')
+        first_new_date = new_rows.index.min()
+        raw = pd.concat([history[history.index < first_new_date], new_rows[history.columns]]).asfreq('D')
+        raw.to_hdf(self.raw_cache_path, key='raw')
+
+        # impute with the statistics of the whole train set like the full preprocessing, not only of the window
+        raw = self.clean_raw_data(df=raw.copy(), test_set_size_percentage=test_set_size_percentage,
+                                  imputation_method=imputation_method)
+        raw_window = raw.tail(self.get_feature_history_length() + new_rows.shape[0]).copy()
+        categorical_columns = list(raw_window.select_dtypes(include=['string']).columns)
+        features = self.add_features(df=raw_window)
+        features = features[features.index >= first_new_date].copy()
+
+        filename_h5 = os.path.join(self.data_dir, self.data + '.h5')
+        updated_datasets = []
+        for dataset in datasets:
+            missing_columns = [column for column in dataset.columns if column not in features.columns]
+            # one-hot-encoded categories not occurring in the window, e.g. holidays, are the only zero columns
+            missing_categories = [column for column in missing_columns
+                                  if any(column.startswith(categorical_column + '_')
+                                         for categorical_column in categorical_columns)]
+            if len(missing_categories) < len(missing_columns):
+                raise Exception('The features of the new rows miss the columns ' +
+                                str([column for column in missing_columns if column not in missing_categories]) +
+                                ' of ' + dataset.name + '. Please delete ' + self.data + '.h5 to preprocess again.')
+            for column in missing_categories:
+                features[column] = 0
+            new_dataset_rows = features[dataset.columns].dropna()
+            updated_dataset = pd.concat([dataset[dataset.index < first_new_date], new_dataset_rows])
+            updated_dataset.name = dataset.name
+            updated_dataset.to_hdf(filename_h5, key=dataset.name)
+            updated_datasets.append(updated_dataset)
+        self.data_source.commit_high_water_mark()
+        print('---New rows added---')
+        return updated_datasets
+
+    def get_feature_history_length(self) -> int:
+        """
+        Get the number of raw rows in front of new rows needed to compute all statistical features of the new rows
+
+        :return: number of raw rows
+        """
+        windowsize = max(self.windowsize_current_statistics, self.windowsize_lagged_statistics)
+        # the check for enough seasonal lags in add_features() requires more than two times the maximum lag
+        n_periods = (2 * max(self.seasonal_lags) + 1) * self.seasonal_periods + windowsize + 1
+        if self.resample_weekly:
+            return n_periods * 7
+        # weekday statistics are based on the same weekday of the previous weeks
+        return max(n_periods, 7 * (self.windowsize_current_statistics + 1))
 
     def drop_non_target_useless_columns(self, df: pd.DataFrame):
         """
@@ -237,12 +432,9 @@ class Dataset:
 
         return corr_p_top_n
 
-    def featureadding_and_resampling(self, df: pd.DataFrame) -> list:
+    def add_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """
-        Function preparing train and test sets for training based on raw dataset:
-        - Feature Extraction
-        (- Resampling if specified)
-        - Deletion of non-target sales columns
+        Function adding the calendar and statistical features, one-hot-encoding and resampling the data if specified
 
         :param df: dataset with raw samples
 
@@ -309,6 +501,21 @@ class Dataset:
                 drop_columns(df=df, columns=self.correlations)
             print('-Added statistical dataset-')
 
+        return df
+
+    def featureadding_and_resampling(self, df: pd.DataFrame) -> list:
+        """
+        Function preparing train and test sets for training based on raw dataset:
+        - Feature Extraction
+        (- Resampling if specified)
+        - Deletion of non-target sales columns
+
+        :param df: dataset with raw samples
+
+        :return: Data with added features and resampling
+        """
+        df = self.add_features(df=df)
+
         # drop a column if it only contains nans
         for column in df:
             if df[column].isnull().all():
@@ -0,0 +1,186 @@
+import abc
+import configparser
+import contextlib
+import json
+import os
+import sqlite3
+import pandas as pd
+
+
+class DataSource(abc.ABC):
+    """
+    Parent class for all sources the raw data of a :obj:`~ForeTiS.preprocess.base_dataset.Dataset` can be loaded from.
+
+    ** Attributes **
+
+        - date_column (*str*): the name of the column containing the date
+        - supports_incremental (*bool*): whether the source can deliver only the rows added since the last pull
+
+    :param date_column: the name of the column containing the date
+    """
+    supports_incremental = False
+
+    def __init__(self, date_column: str):
+        self.date_column = date_column
+
+    @abc.abstractmethod
+    def get_available_columns(self) -> list:
+        """
+        Get the names of all columns of the source except the date column
+
+        :return: list of column names
+        """
+
+    @abc.abstractmethod
+    def load(self, columns: list = None, only_new_rows: bool = False) -> pd.DataFrame:
+        """
+        Load the raw data with the date as index
+
+        :param columns: columns to load, all columns if None
+        :param only_new_rows: whether to only load the rows added since the last committed pull
+
+        :return: DataFrame with the raw data
+        """
+
+    def commit_high_water_mark(self):
+        """
+        Persist the newest date delivered by the last call of load(), so that later runs only fetch newer rows.
+        Only relevant for sources supporting incremental pulls.
+        """
+
+
+class CSVSource(DataSource):
+    """
+    Data source reading the raw data from a CSV file.
+    See :obj:`~ForeTiS.preprocess.data_source.DataSource` for more information.
+
+    :param path: path of the CSV file
+    :param date_column: the name of the column containing the date
+    :param datatype: if the data is in american or german type
+    """
+    def __init__(self, path: str, date_column: str, datatype: str):
+        super().__init__(date_column=date_column)
+        self.path = path
+        self.read_csv_kwargs = {'sep': ';', 'decimal': ','} if datatype == 'german' else {}
+
+    def get_available_columns(self) -> list:
+        """
+        See :obj:`~ForeTiS.preprocess.data_source.DataSource` for more information
+        """
+        columns = pd.read_csv(self.path, nrows=0, **self.read_csv_kwargs).columns
+        return [column for column in columns if column != self.date_column]
+
+    def load(self, columns: list = None, only_new_rows: bool = False) -> pd.DataFrame:
+        """
+        See :obj:`~ForeTiS.preprocess.data_source.DataSource` for more information
+        """
+        usecols = None if columns is None else [self.date_column] + list(columns)
+        dataset_raw = pd.read_csv(self.path, index_col=self.date_column, usecols=usecols, **self.read_csv_kwargs)
+        dataset_raw.index = pd.to_datetime(dataset_raw.index, format='%Y-%m-%d')
+        return dataset_raw
+
+
+class SQLiteSource(DataSource):
+    """
+    Data source pulling the raw data from a table of a SQLite database.
+    Only the needed columns are pulled with a single query. The newest pulled date is remembered as high-water-mark
+    in a small json file, so that later runs only fetch the rows added in the meantime.
+    See :obj:`~ForeTiS.preprocess.data_source.DataSource` for more information.
+
+    ** Attributes **
+
+        - high_water_mark (*str*): newest date that was already pulled and processed, None if nothing was pulled yet
+
+    :param db_path: path of the SQLite database
+    :param table: table containing the raw data
+    :param date_column: the name of the column containing the date
+    :param state_path: file to persist the high-water-mark, defaults to a file next to the database
+    """
+    supports_incremental = True
+
+    def __init__(self, db_path: str, table: str, date_column: str, state_path: str = None):
+        super().__init__(date_column=date_column)
+        if not os.path.exists(db_path):
+            raise Exception('Specified SQLite database ' + db_path + ' does not exist. Please double-check.')
+        self.db_path = db_path
+        self.table = table
+        self.state_path = state_path if state_path is not None else db_path + '.' + table + '.hwm.json'
+        self.high_water_mark = None
+        if os.path.exists(self.state_path):
+            with open(self.state_path, 'r') as state_file:
+                self.high_water_mark = json.load(state_file)['high_water_mark']
+        self.pending_high_water_mark = None
+
+    @staticmethod
+    def quote(identifier: str) -> str:
+        """
+        Quote an identifier (e.g. a column name containing spaces) for the use in a SQL statement
+
+        :param identifier: identifier to quote
+
+        :return: quoted identifier
+        """
+        return '"' + identifier.replace('"', '""') + '"'
+
+    def get_available_columns(self) -> list:
+        """
+        See :obj:`~ForeTiS.preprocess.data_source.DataSource` for more information
+        """
+        with contextlib.closing(sqlite3.connect(self.db_path)) as connection:
+            columns = [row[1] for row in connection.execute('PRAGMA table_info(' + self.quote(self.table) + ')')]
+        if len(columns) == 0:
+            raise Exception('Table ' + self.table + ' not found in SQLite database ' + self.db_path + '.')
+        return [column for column in columns if column != self.date_column]
+
+    def load(self, columns: list = None, only_new_rows: bool = False) -> pd.DataFrame:
+        """
+        See :obj:`~ForeTiS.preprocess.data_source.DataSource` for more information
+        """
+        columns = self.get_available_columns() if columns is None else columns
+        query = 'SELECT ' + ', '.join(self.quote(column) for column in [self.date_column] + list(columns)) + \
+                ' FROM ' + self.quote(self.table)
+        params = []
+        if only_new_rows and self.high_water_mark is not None:
+            query += ' WHERE ' + self.quote(self.date_column) + ' > ?'
+            params.append(self.high_water_mark)
+        query += ' ORDER BY ' + self.quote(self.date_column)
+        with contextlib.closing(sqlite3.connect(self.db_path)) as connection:
+            dataset_raw = pd.read_sql_query(query, connection, params=params, index_col=self.date_column)
+        # remember the raw value to compare against in the next query, it only gets persisted after processing
+        self.pending_high_water_mark = dataset_raw.index.max() if not dataset_raw.empty else None
+        dataset_raw.index = pd.to_datetime(dataset_raw.index)
+        return dataset_raw
+
+    def commit_high_water_mark(self):
+        """
+        See :obj:`~ForeTiS.preprocess.data_source.DataSource` for more information
+        """
+        if self.pending_high_water_mark is None:
+            return
+        self.high_water_mark = str(self.pending_high_water_mark)
+        self.pending_high_water_mark = None
+        with open(self.state_path, 'w') as state_file:
+            json.dump({'table': self.table, 'high_water_mark': self.high_water_mark}, state_file)
+
+
+def get_data_source(data_dir: str, data: str, config: configparser.ConfigParser) -> DataSource:
+    """
+    Get the data source specified for a dataset in dataset_specific_config.ini.
+    Set *source = sqlite* (and optionally *sqlite_db* and *sqlite_table*) to pull the data from a SQLite database,
+    otherwise the data is read from data_dir/data.csv
+
+    :param data_dir: data directory where the data is stored
+    :param data: the dataset that you want to use
+    :param config: the information from dataset_specific_config.ini
+
+    :return: data source for the dataset
+    """
+    source = config[data].get('source', 'csv')
+    if source == 'sqlite':
+        return SQLiteSource(db_path=os.path.join(data_dir, config[data].get('sqlite_db', data + '.db')),
+                            table=config[data].get('sqlite_table', data),
+                            date_column=config[data]['date_column'])
+    if source == 'csv':
+        return CSVSource(path=os.path.join(data_dir, data + '.csv'), date_column=config[data]['date_column'],
+                         datatype=config[data]['datatype'])
+    raise Exception('Specified source ' + source + ' for ' + data + ' is invalid, has to be: csv | sqlite')
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+from multiprocessing import shared_memory
+
+# alignment of the columns in the shared memory block in bytes
+_ALIGNMENT = 64
+
+# featuresets attached in this process by the name of their shared memory block, so that each block is only mapped
+# once per process, no matter how many objects referencing it are unpickled
+_attached_featuresets = {}
+
+
+def share_featureset(df: pd.DataFrame) -> tuple:
+    """
+    Copy the numeric columns of a featureset into a new shared memory block.
+    Each column is stored contiguously, so that the featureset can be rebuilt from the block without copying.
+    Other columns (e.g. strings) are small and are kept in the description, which is copied to each process.
+    :param df: featureset to share
+    :return: tuple of the shared memory block and the json-like description to attach to it
+    """
+    layout = []
+    other_columns = {}
+    offset = 0
+    for position in range(df.shape[1]):
+        values = df.iloc[:, position].values
+        if isinstance(values, np.ndarray) and values.dtype.kind in 'biufc':
+            layout.append((position, values.dtype.str, offset))
+            offset += -(-values.nbytes // _ALIGNMENT) * _ALIGNMENT
+        else:
+            other_columns[position] = df.iloc[:, position]
+    block = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for position, dtype, column_offset in layout:
+        column = np.ndarray(shape=(df.shape[0],), dtype=dtype, buffer=block.buf, offset=column_offset)
+        column[:] = df.iloc[:, position].values
+    description = {'block_name': block.name, 'name': getattr(df, 'name', None), 'index': df.index,
+                   'columns': df.columns, 'layout': layout, 'other_columns': other_columns}
+    return block, description
+
+
+def get_featureset(block: shared_memory.SharedMemory, description: dict) -> pd.DataFrame:
+    """
+    Build a read-only featureset on top of a shared memory block.
+    Each column stays a separate view on the block, as pandas does not consolidate columns passed with copy=False.
+    :param block: shared memory block containing the featureset
+    :param description: description of the featureset, see share_featureset()
+    :return: featureset
+    """
+    n_rows = len(description['index'])
+    columns = {}
+    for position, dtype, column_offset in description['layout']:
+        column = np.ndarray(shape=(n_rows,), dtype=dtype, buffer=block.buf, offset=column_offset)
+        column.flags.writeable = False
+        columns[position] = column
+    for position, column in description['other_columns'].items():
+        columns[position] = column.values
+    positions = sorted(columns.keys())
+    df = pd.DataFrame({position: columns[position] for position in positions}, index=description['index'],
+                      copy=False)
+    df.columns = description['columns']
+    df.name = description['name']
+    return df
+
+
+def register_featureset(block: shared_memory.SharedMemory, df: pd.DataFrame):
+    """
+    Register a featureset shared by this process, so that unpickled references in this process use it as well
+    :param block: shared memory block containing the featureset
+    :param df: featureset built on top of the block
+    """
+    _attached_featuresets[block.name] = (block, df)
+
+
+def attach_featureset(description: dict) -> pd.DataFrame:
+    """
+    Attach to a featureset shared by another process. The block is only mapped once per process.
+    :param description: description of the featureset, see share_featureset()
+    :return: read-only featureset
+    """
+    if description['block_name'] not in _attached_featuresets:
+        # processes attaching are spawned by the owner and share its resource tracker,
+        # so the block is only unlinked by the owner
+        block = shared_memory.SharedMemory(name=description['block_name'])
+        register_featureset(block=block, df=get_featureset(block=block, description=description))
+    return _attached_featuresets[description['block_name']][1]
+
+
+def release_featureset(block: shared_memory.SharedMemory, unlink: bool):
+    """
+    Release a shared memory block in this process
+    :param block: shared memory block to release
+    :param unlink: whether to also free the block itself, only done by the process that created it
+    """
+    _attached_featuresets.pop(block.name, None)
+    try:
+        block.close()
+    except BufferError:
+        # featuresets built on the block are still referenced, the mapping is closed once they are collected
+        pass
+    if unlink:
+        block.unlink()
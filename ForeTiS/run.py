@@ -89,6 +89,10 @@ if __name__ == '__main__':
                         help="specify whether to save the final model to hard drive or not "
                              "(caution: some models may use a lot of disk space, "
                              "unfitted models that can be retrained are already saved by default).")
+    parser.add_argument("-evc", "--export_validation_csv", type=bool, default=True,
+                        help="specify whether to export the validation results of the best trial as CSV in addition "
+                             "to the binary npz file written during the optimization. "
+                             "Standard is True")
     parser.add_argument("-prc", "--periodical_refit_cycles", type=list, default=['complete', 0, 1, 2, 4, 8],
                         help="specify with which periods periodical refitting will be done. "
                              "0 means no periodical refitting, "
@@ -104,6 +108,101 @@ if __name__ == '__main__':
     parser.add_argument("-iri", "--intermediate_results_interval", type=int, default=None,
                         help="specify the number of trials after which intermediate results will be calculated. "
                              "Standard is None")
+    parser.add_argument("-nj", "--n_jobs", type=int, default=1,
+                        help="specify the number of processes running trials in parallel. All processes share the "
+                             "storage of the study. "
+                             "Standard is 1")
+    parser.add_argument("-fj", "--fold_jobs", type=int, default=1,
+                        help="specify the number of processes evaluating the folds of a trial in parallel. "
+                             "Useful for slow models and if only a few trials run in parallel. "
+                             "Standard is 1")
+    parser.add_argument("-inf", "--incremental_folds", type=bool, default=False,
+                        help="Only relevant for timeseries-cv: specify whether to start the training on each fold "
+                             "from the model fitted on the previous fold (PyTorch models, XGBoost, Gpr, ElasticNet "
+                             "and Lasso) with a reduced training budget. Only used if fold_jobs is 1 and no timeout "
+                             "is set. Standard is False")
+    parser.add_argument("-utc", "--use_trial_cache", type=bool, default=False,
+                        help="specify whether to reuse the fold results of hyperparameter configurations already "
+                             "evaluated in any previous run on the same data, split and settings. The results are "
+                             "cached in save_dir/trial_cache, delete it after changing the implementation of a model. "
+                             "Standard is False")
+    parser.add_argument("-res", "--resume", type=bool, default=False,
+                        help="specify whether to resume the latest interrupted run of each model and featureset in "
+                             "save_dir instead of starting new ones. Trials of the interrupted run are kept and the "
+                             "optimization continues until n_trials trials exist. "
+                             "Standard is False")
+    parser.add_argument("-sto", "--study_timeout", type=int, default=None,
+                        help="specify the time budget of each study in seconds. No new trials are started afterwards "
+                             "and running trials are stopped and treated as pruned. "
+                             "Standard is None, i.e. only the number of trials is limited")
+    parser.add_argument("-tto", "--trial_timeout", type=int, default=None,
+                        help="specify the time budget of each trial in seconds. Trials exceeding it are stopped by "
+                             "terminating the worker process evaluating the folds and are treated as pruned. "
+                             "Standard is None")
+    parser.add_argument("-tml", "--trial_memory_limit_mb", type=float, default=None,
+                        help="specify the maximal memory (RSS) in MB of the worker process evaluating the folds of a "
+                             "trial. Trials exceeding it are stopped by terminating the worker process and are "
+                             "treated as pruned. Only available on Linux. "
+                             "Standard is None")
+    parser.add_argument("-tpw", "--trials_per_worker", type=int, default=None,
+                        help="Only relevant if study_timeout, trial_timeout or trial_memory_limit_mb is specified: "
+                             "define the number of trials after which the worker processes evaluating the folds are "
+                             "restarted to release memory. Standard is None, i.e. the workers are kept")
+    parser.add_argument("-pr", "--pruner", type=str, default='percentile',
+                        help="specify the pruning strategy: 'percentile' | 'hyperband'. "
+                             "With 'hyperband', PyTorch models are pruned based on the validation loss of each epoch "
+                             "after a minimal epoch budget. "
+                             "Standard is 'percentile'")
+    parser.add_argument("-peb", "--pruning_epoch_budget", type=int, default=None,
+                        help="Only relevant if pruner is 'hyperband': define the number of epochs every trial of a "
+                             "PyTorch model gets before it can be pruned based on the validation loss of each epoch. "
+                             "Standard is None, i.e. the budget of the model (20 epochs)")
+    parser.add_argument("-mo", "--multi_objective", type=bool, default=False,
+                        help="specify whether to minimize the measured per-row prediction latency along with the "
+                             "validation result. Trials are sampled with NSGA-II and not pruned. The final model is "
+                             "selected from the Pareto front. "
+                             "Standard is False")
+    parser.add_argument("-mlat", "--max_latency_ms", type=float, default=None,
+                        help="Only relevant if multi_objective is True: define the maximal per-row prediction latency "
+                             "in milliseconds of the final model. The most accurate trial of the Pareto front below it "
+                             "is selected. Standard is None, i.e. the most accurate trial of the Pareto front")
+    parser.add_argument("-lfs", "--low_fidelity_seasons", type=int, default=None,
+                        help="specify the number of most recent seasons each trial is first trained on in a "
+                             "low-fidelity stage. Only trials that are not pruned after this stage are evaluated on "
+                             "the full folds. Not used with multi_objective, only available for the datasplits "
+                             "timeseries-cv and train-val-test. "
+                             "Standard is None, i.e. all trials are evaluated on the full folds")
+    parser.add_argument("-wss", "--warm_start_studies", nargs='+', type=str, default=None,
+                        help="specify the paths of optuna databases (Optuna_DB-*.db) of previous runs to warm-start "
+                             "the optimization with. Only studies of the same model are used. "
+                             "Standard is None")
+    parser.add_argument("-wsk", "--warm_start_top_k", type=int, default=10,
+                        help="Only relevant if warm_start_studies are specified: define the number of best "
+                             "configurations of the previous runs to evaluate first. "
+                             "Standard is 10")
+    parser.add_argument("-wsm", "--warm_start_mode", type=str, default='enqueue',
+                        help="Only relevant if warm_start_studies are specified: 'enqueue' (evaluate the top-k "
+                             "configurations first) | 'transfer' (add all trials to the history of the sampler) | "
+                             "'both'. "
+                             "Standard is 'enqueue'")
+    parser.add_argument("-rac", "--racing", type=bool, default=False,
+                        help="specify whether to race the studies of all models and featuresets against each other "
+                             "with successive halving instead of running n_trials trials for every study. The trials "
+                             "of the studies are interleaved and after each rung, only the studies with the best "
+                             "validation results continue and get the trials of the eliminated ones. "
+                             "Standard is False")
+    parser.add_argument("-reta", "--racing_eta", type=int, default=3,
+                        help="Only relevant if racing is True: define the reduction factor of the successive "
+                             "halving, i.e. only the best 1/racing_eta of the studies continue after each rung. "
+                             "Standard is 3")
+    parser.add_argument("-sj", "--study_jobs", type=int, default=1,
+                        help="specify the number of cores to run the studies of the models and featuresets on "
+                             "concurrently. The studies are scheduled longest first based on the expected runtime, "
+                             "threads and memory of each model. "
+                             "Standard is 1")
+    parser.add_argument("-mem", "--max_memory_gb", type=float, default=None,
+                        help="Only relevant if study_jobs > 1: define the memory in GB the concurrent studies "
+                             "may use. Standard is None, i.e. not limited")
 
     # Only relevant for Neural Networks #
     parser.add_argument("-bs", "--batch_size", type=int, default=None,
@@ -1,7 +1,7 @@
 import os
 
-from . import helper_functions
-from ..model import _torch_model, _tensorflow_model
+from . import helper_functions, memory_monitor
+from ..model import _model_registry
 
 
 def check_all_specified_arguments(arguments: dict):
@@ -21,6 +21,77 @@ def check_all_specified_arguments(arguments: dict):
         raise Exception('Specified validation set size in percentage '
                         + str(arguments["val_set_size_percentage"]) + ' is invalid, has to be between 5 and 30.')
 
+    if arguments["n_jobs"] < 1:
+        raise Exception('Specified number of jobs ' + str(arguments["n_jobs"]) + ' is invalid, has to be at least 1.')
+    if arguments["fold_jobs"] < 1:
+        raise Exception('Specified number of fold jobs ' + str(arguments["fold_jobs"]) +
+                        ' is invalid, has to be at least 1.')
+
+    if arguments["study_jobs"] < 1:
+        raise Exception('Specified number of study jobs ' + str(arguments["study_jobs"]) +
+                        ' is invalid, has to be at least 1.')
+    if arguments["max_memory_gb"] is not None and arguments["max_memory_gb"] <= 0:
+        raise Exception('Specified memory ' + str(arguments["max_memory_gb"]) + ' GB is invalid, has to be positive.')
+
+    if arguments["racing"]:
+        if arguments["racing_eta"] < 2:
+            raise Exception('Specified racing reduction factor ' + str(arguments["racing_eta"]) +
+                            ' is invalid, has to be at least 2.')
+        if arguments["study_jobs"] > 1:
+            raise Exception('The trials of the studies are interleaved when racing, so they can not be scheduled '
+                            'on several study jobs. Use n_jobs to run the trials of each study in parallel.')
+
+    for timeout in ['study_timeout', 'trial_timeout']:
+        if arguments[timeout] is not None and arguments[timeout] <= 0:
+            raise Exception('Specified ' + timeout + ' ' + str(arguments[timeout]) + ' is invalid, has to be positive.')
+
+    if arguments["trial_memory_limit_mb"] is not None:
+        if arguments["trial_memory_limit_mb"] <= 0:
+            raise Exception('Specified trial memory limit ' + str(arguments["trial_memory_limit_mb"]) +
+                            ' MB is invalid, has to be positive.')
+        if not memory_monitor.is_available():
+            raise Exception('The memory of the worker processes can not be monitored on this system, '
+                            'trial_memory_limit_mb is only available on Linux.')
+    if arguments["trials_per_worker"] is not None and arguments["trials_per_worker"] < 1:
+        raise Exception('Specified number of trials per worker ' + str(arguments["trials_per_worker"]) +
+                        ' is invalid, has to be at least 1.')
+
+    if arguments["pruner"] not in ['percentile', 'hyperband']:
+        raise Exception('Specified pruner ' + arguments["pruner"] + ' is invalid, has to be: percentile | hyperband')
+    if arguments["pruning_epoch_budget"] is not None:
+        if arguments["pruning_epoch_budget"] < 1:
+            raise Exception('Specified pruning epoch budget ' + str(arguments["pruning_epoch_budget"]) +
+                            ' is invalid, has to be at least 1.')
+        if arguments["n_epochs"] is not None and arguments["pruning_epoch_budget"] > arguments["n_epochs"]:
+            raise Exception('Specified pruning epoch budget ' + str(arguments["pruning_epoch_budget"]) +
+                            ' is invalid, can not be larger than the number of epochs ' + str(arguments["n_epochs"]) +
+                            '.')
+
+    if arguments["warm_start_studies"] is not None:
+        for db_path in arguments["warm_start_studies"]:
+            if not os.path.exists(db_path):
+                raise Exception('Specified study database ' + db_path + ' for warm start does not exist. '
+                                'Please double-check.')
+        if arguments["warm_start_mode"] not in ['enqueue', 'transfer', 'both']:
+            raise Exception('Specified warm start mode ' + arguments["warm_start_mode"] + ' is invalid, '
+                            'has to be: enqueue | transfer | both')
+
+    if arguments["low_fidelity_seasons"] is not None:
+        if arguments["low_fidelity_seasons"] < 2:
+            raise Exception('Specified number of low-fidelity seasons ' + str(arguments["low_fidelity_seasons"]) +
+                            ' is invalid, has to be at least 2, as some models need two seasonal cycles.')
+        if arguments["datasplit"] not in ['timeseries-cv', 'train-val-test']:
+            raise Exception('The low-fidelity stage trains on the most recent rows, which is only a shortened '
+                            'history for the datasplits timeseries-cv and train-val-test.')
+
+    if arguments["multi_objective"]:
+        if arguments["max_latency_ms"] is not None and arguments["max_latency_ms"] <= 0:
+            raise Exception('Specified latency cap ' + str(arguments["max_latency_ms"]) +
+                            ' ms is invalid, has to be positive.')
+        if arguments["warm_start_studies"] is not None and arguments["warm_start_mode"] != 'enqueue':
+            raise Exception('Trials of previous runs can only be transferred to single-objective studies, '
+                            'use warm_start_mode enqueue for multi_objective.')
+
     # Check spelling of datasplit and model
     if arguments["datasplit"] not in ['timeseries-cv', 'cv', 'train-val-test']:
         raise Exception('Specified datasplit ' + arguments["datasplit"] + ' is invalid, '
@@ -33,8 +104,7 @@ def check_all_specified_arguments(arguments: dict):
                         str(helper_functions.get_list_of_implemented_models()))
 
     # Only relevant for neural networks
-    if any([issubclass(helper_functions.get_mapping_name_to_class()[model], _torch_model.TorchModel) or
-            issubclass(helper_functions.get_mapping_name_to_class()[model],  _tensorflow_model.TensorflowModel)
+    if any([_model_registry.get_model_family(model_name=model) in ['torch', 'tensorflow']
             for model in arguments["models"]]):
         if arguments["batch_size"] is not None:
             if not (2**3 <= arguments["batch_size"] <= 2**8):
@@ -1,13 +1,9 @@
-import os
-import inspect
-import importlib
+import sys
 import pandas as pd
-import torch
-import tensorflow as tf
 import random
 import numpy as np
 from sklearn.model_selection import TimeSeriesSplit, ShuffleSplit
-import ForeTiS.model
+from ..model import _model_registry
 
 
 def get_list_of_featuresets() -> list:
@@ -25,60 +21,58 @@ def get_list_of_featuresets() -> list:
 
 def get_list_of_implemented_models() -> list:
     """
-    Create a list of all implemented models based on files existing in 'model' subdirectory of the repository.
+    Create a list of all implemented models based on the model registry and the files existing in 'model' subdirectory
+    of the repository. No model gets imported.
     """
     # Assumption: naming of python source file is the same as the model name specified by the user
-    if os.path.exists('../model'):
-        model_src_files = os.listdir('../model')
-    elif os.path.exists('model'):
-        model_src_files = os.listdir('model')
-    elif os.path.exists('ForeTiS/model'):
-        model_src_files = os.listdir('ForeTiS/model')
-    else:
-        model_src_files = [model_file + '.py' for model_file in ForeTiS.model.__all__]
-    model_src_files = [file for file in model_src_files if file[0] != '_']
-    return [model[:-3] for model in model_src_files]
+    return _model_registry.get_model_names()
 
 
 def get_mapping_name_to_class() -> dict:
     """
     Get a mapping from model name (naming in package model without .py) to class name.
+    Caution: imports all models, use :obj:`~ForeTiS.model._model_registry.get_model_class` to get a single class.
     :return: dictionary with mapping model name to class name
     """
-    if os.path.exists('../model'):
-        files = os.listdir('../model')
-    elif os.path.exists('model'):
-        files = os.listdir('model')
-    elif os.path.exists('ForeTiS/model'):
-        files = os.listdir('ForeTiS/model')
-    else:
-        files = [model_file + '.py' for model_file in ForeTiS.model.__all__]
-    modules_mapped = {}
-    for file in files:
-        if file not in ['__init__.py', '__pycache__']:
-            if file[-3:] != '.py':
-                continue
-
-            file_name = file[:-3]
-            module_name = 'ForeTiS.model.' + file_name
-            for name, cls in inspect.getmembers(importlib.import_module(module_name), inspect.isclass):
-                if cls.__module__ == module_name:
-                    modules_mapped[file_name] = cls
-    return modules_mapped
+    return {model_name: _model_registry.get_model_class(model_name=model_name)
+            for model_name in get_list_of_implemented_models()}
+
+
+# seed of the last set_all_seeds() call, used for frameworks that are imported afterwards
+_current_seed = 0
+
 
 def set_all_seeds(seed: int=0):
     """
-    Set all seeds of libs with a specific function for reproducibility of results
+    Set all seeds of libs with a specific function for reproducibility of results.
+    PyTorch and TensorFlow are only seeded if they are already imported, otherwise they get seeded on import
+    of the parent model class with :obj:`~ForeTiS.utils.helper_functions.set_framework_seed`
     :param seed: seed to use
     """
-    torch.manual_seed(seed)
-    torch.cuda.manual_seed_all(seed)
-    torch.cuda.manual_seed(seed)
+    global _current_seed
+    _current_seed = seed
     random.seed(seed)
     np.random.seed(seed)
-    torch.backends.cudnn.deterministic = True
-    torch.backends.cudnn.benchmark = False
-    tf.random.set_seed(seed)
+    for framework in ['torch', 'tensorflow']:
+        if framework in sys.modules:
+            set_framework_seed(framework=framework)
+
+
+def set_framework_seed(framework: str):
+    """
+    Set the seeds of a deep learning framework to the seed of the last set_all_seeds() call
+    :param framework: framework to seed: 'torch' | 'tensorflow'
+    """
+    if framework == 'torch':
+        import torch
+        torch.manual_seed(_current_seed)
+        torch.cuda.manual_seed_all(_current_seed)
+        torch.cuda.manual_seed(_current_seed)
+        torch.backends.cudnn.deterministic = True
+        torch.backends.cudnn.benchmark = False
+    elif framework == 'tensorflow':
+        import tensorflow as tf
+        tf.random.set_seed(_current_seed)
 
 def get_folds(datasplit: str, n_splits: int):
     """
@@ -0,0 +1,65 @@
+import argparse
+import statistics
+import subprocess
+import sys
+
+from ..model import _model_registry
+
+# modules imported by every run independent of the models
+_CORE_MODULES = ['ForeTiS.utils.helper_functions', 'ForeTiS.optim_pipeline']
+
+
+def measure_import_time(module_name: str, repetitions: int) -> float:
+    """
+    Measure the time to import a module in a fresh interpreter, so that no module is cached from a previous import
+    :param module_name: module to import
+    :param repetitions: number of fresh interpreters to measure, the median is returned
+    :return: median import time in seconds
+    """
+    code = 'import time, importlib\n' \
+           'start = time.perf_counter()\n' \
+           'importlib.import_module("' + module_name + '")\n' \
+           'print(time.perf_counter() - start)'
+    times = []
+    for _ in range(repetitions):
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True)
+        if result.returncode != 0:
+            raise Exception('Import of ' + module_name + ' failed:\n' + result.stderr)
+        times.append(float(result.stdout.strip().splitlines()[-1]))
+    return statistics.median(times)
+
+
+def run_benchmark(models: list = None, repetitions: int = 3) -> dict:
+    """
+    Measure the startup cost of the core modules and of each model, grouped by model family
+    :param models: models to measure, all implemented models if None
+    :param repetitions: number of fresh interpreters per module
+    :return: dictionary with the import time in seconds per module
+    """
+    models = _model_registry.get_model_names() if models is None else models
+    import_times = {}
+    for module_name in _CORE_MODULES:
+        import_times[module_name] = measure_import_time(module_name=module_name, repetitions=repetitions)
+        print(module_name + ': ' + '%.3f' % import_times[module_name] + ' s')
+    for family in sorted(set(_model_registry.get_model_family(model_name=model) for model in models)):
+        print('## Family ' + family + ' ##')
+        for model in models:
+            if _model_registry.get_model_family(model_name=model) != family:
+                continue
+            import_times[model] = measure_import_time(
+                module_name=_model_registry.get_model_module(model_name=model), repetitions=repetitions)
+            print('  ' + model + ': ' + '%.3f' % import_times[model] + ' s')
+    return import_times
+
+
+if __name__ == '__main__':
+    """
+    Benchmark of the import time per model family, run with python -m ForeTiS.utils.import_benchmark
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-mod", "--models", nargs='+', type=str, default=None,
+                        help="specify the models to measure. Standard is all implemented models")
+    parser.add_argument("-rep", "--repetitions", type=int, default=3,
+                        help="specify the number of fresh interpreters per measured module. Standard is 3")
+    args = vars(parser.parse_args())
+    run_benchmark(**args)
@@ -0,0 +1,57 @@
+import os
+
+
+def get_rss_mb(pid: int = None) -> float:
+    """
+    Get the current resident set size (RSS) of a process, only available on Linux
+    :param pid: id of the process, the own process if None
+    :return: RSS in MB, None if it can not be read
+    """
+    return _read_status_mb(pid=pid, field='VmRSS')
+
+
+def get_peak_rss_mb(pid: int = None) -> float:
+    """
+    Get the peak resident set size (RSS) of a process since its start or since the last reset_peak_rss()
+    :param pid: id of the process, the own process if None
+    :return: peak RSS in MB, None if it can not be read
+    """
+    return _read_status_mb(pid=pid, field='VmHWM')
+
+
+def reset_peak_rss():
+    """
+    Reset the peak RSS of the own process to its current RSS, e.g. to measure the peak of each task of a
+    long-lived worker process. Nothing is done if the kernel does not support it.
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as clear_refs:
+            clear_refs.write('5')
+    except OSError:
+        pass
+
+
+def is_available() -> bool:
+    """
+    Check if the memory of processes can be monitored
+    :return: bool reflecting if the memory can be monitored
+    """
+    return os.path.exists('/proc/self/status')
+
+
+def _read_status_mb(pid: int, field: str) -> float:
+    """
+    Read a memory field of the status of a process
+    :param pid: id of the process, the own process if None
+    :param field: name of the field, e.g. VmRSS
+    :return: value in MB, None if it can not be read
+    """
+    try:
+        with open('/proc/' + ('self' if pid is None else str(pid)) + '/status') as status:
+            for line in status:
+                if line.startswith(field + ':'):
+                    # the values are given in kB
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
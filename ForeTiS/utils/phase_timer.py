@@ -0,0 +1,92 @@
+import contextlib
+import json
+import time
+
+# ! Adapt if a new phase is timed, the phases are the columns of the runtime overview !
+PHASES = ['model_creation', 'snapshot', 'clone', 'fit_validate', 'predict_val', 'predict_train', 'metrics',
+          'save_model', 'write_results', 'load_retrain', 'predict_retrain', 'refit_predict', 'feature_importance']
+
+
+class PhaseTimer:
+    """
+    Lightweight timer accumulating the wall time of the phases of a trial or of the final evaluation,
+    optionally broken down by fold.
+
+    ** Attributes **
+
+        - durations (*dict*): accumulated duration in seconds per phase over all folds
+        - fold_durations (*dict*): duration in seconds per phase for each fold
+
+    """
+    def __init__(self):
+        self.durations = {}
+        self.fold_durations = {}
+        self._start_times = {}
+
+    def start(self, phase: str):
+        """
+        Start timing a phase
+        :param phase: name of the phase, has to be in PHASES
+        """
+        if phase not in PHASES:
+            raise Exception('Phase ' + phase + ' is not defined. Defined phases: ' + str(PHASES))
+        self._start_times[phase] = time.perf_counter()
+
+    def stop(self, phase: str, fold: int = None):
+        """
+        Stop timing a phase and add the elapsed time
+        :param phase: name of the phase
+        :param fold: fold the time belongs to, None if it does not belong to a fold
+        """
+        self.add_duration(phase=phase, duration=time.perf_counter() - self._start_times.pop(phase), fold=fold)
+
+    @contextlib.contextmanager
+    def phase(self, phase: str, fold: int = None):
+        """
+        Time a phase with a with-statement
+        :param phase: name of the phase, has to be in PHASES
+        :param fold: fold the time belongs to, None if it does not belong to a fold
+        """
+        self.start(phase=phase)
+        try:
+            yield
+        finally:
+            self.stop(phase=phase, fold=fold)
+
+    def add_duration(self, phase: str, duration: float, fold: int = None):
+        """
+        Add a duration measured elsewhere, e.g. in a worker process
+        :param phase: name of the phase
+        :param duration: duration in seconds
+        :param fold: fold the time belongs to, None if it does not belong to a fold
+        """
+        self.durations[phase] = self.durations.get(phase, 0) + duration
+        if fold is not None:
+            self.fold_durations.setdefault(fold, {})
+            self.fold_durations[fold][phase] = self.fold_durations[fold].get(phase, 0) + duration
+
+    def add_fold_durations(self, fold: int, durations: dict):
+        """
+        Add the durations of the phases of a fold
+        :param fold: number of the fold
+        :param durations: duration in seconds per phase
+        """
+        for phase, duration in durations.items():
+            self.add_duration(phase=phase, duration=duration, fold=fold)
+
+    def get_runtime_columns(self) -> dict:
+        """
+        Get the durations as columns for the runtime overview
+        :return: dictionary with the duration of each phase and the json encoded durations per fold
+        """
+        columns = {column: self.durations.get(phase) for phase, column in zip(PHASES, get_phase_columns())}
+        columns['phase_times_per_fold'] = json.dumps(self.fold_durations) if len(self.fold_durations) > 0 else None
+        return columns
+
+
+def get_phase_columns() -> list:
+    """
+    Get the names of the columns of all phases in the runtime overview
+    :return: list of column names
+    """
+    return ['time_' + phase + '_s' for phase in PHASES]
@@ -0,0 +1,175 @@
+import math
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import TimeSeriesSplit, ShuffleSplit
+
+# split plans computed in this process, shared by all models and featuresets with the same index
+_split_plans = {}
+
+
+class SplitPlan:
+    """
+    Plan of all data splits for one dataset and datasplit as integer positions of the rows.
+    Contiguous parts are stored as slices, so that selecting them with iloc does not copy the underlying data.
+    The plan only depends on the index of a dataset, so it can be reused by every trial, model and featureset.
+
+    ** Attributes **
+
+        - n_rows (*int*): number of rows of the planned dataset
+        - datasplit (*str*): the datasplit the plan was computed for
+        - train_val (*slice* or *np.array*): positions of the train and validation data
+        - test (*slice* or *np.array*): positions of the test data
+        - retrain (*slice* or *np.array*): positions of the data to retrain the final model on
+        - retest (*slice* or *np.array*): positions of the data to test the final model on, which differ from the
+          test data if the year 2021 is the test set, as the final model is tested on the year 2020 then
+        - folds (*list<tuple>*): positions of the train and validation set of each fold
+
+    :param index: index of the dataset to plan the splits for
+    :param datasplit: splitting method: 'timeseries-cv' | 'cv' | 'train-val-test'
+    :param n_splits: number of splits for 'timeseries-cv' and 'cv'
+    :param test_set_size_percentage: the size of the test set in percentage or 2021 to use the year 2021 as test set
+    :param val_set_size_percentage: the size of the validation set in percentage for 'train-val-test'
+    """
+
+    def __init__(self, index: pd.DatetimeIndex, datasplit: str, n_splits: int, test_set_size_percentage: int,
+                 val_set_size_percentage: int):
+        self.n_rows = len(index)
+        self.datasplit = datasplit
+        self.train_val, self.test = get_train_val_test_positions(
+            index=index, test_set_size_percentage=test_set_size_percentage)
+        self.retrain, self.retest = get_train_val_test_positions(
+            index=index, test_set_size_percentage=test_set_size_percentage, test_year=2020)
+        train_val_positions = np.arange(self.n_rows)[self.train_val]
+        if datasplit == 'train-val-test':
+            n_val = math.ceil(val_set_size_percentage * 0.01 * len(train_val_positions))
+            fold_positions = [(np.arange(len(train_val_positions) - n_val),
+                               np.arange(len(train_val_positions) - n_val, len(train_val_positions)))]
+        else:
+            if datasplit == 'timeseries-cv':
+                splitter = TimeSeriesSplit(n_splits=n_splits)
+            elif datasplit == 'cv':
+                splitter = ShuffleSplit(n_splits=n_splits, test_size=0.2, random_state=0)
+            else:
+                raise Exception('Specified datasplit ' + datasplit + ' is invalid, '
+                                'has to be: timeseries-cv | cv | train-val-test')
+            fold_positions = list(splitter.split(train_val_positions))
+        # positions of the folds are relative to the train and validation data
+        self.folds = [(to_indexer(train_val_positions[train]), to_indexer(train_val_positions[val]))
+                      for train, val in fold_positions]
+
+    @property
+    def n_folds(self) -> int:
+        """
+        Number of folds of the plan
+        """
+        return len(self.folds)
+
+    @property
+    def n_train_val(self) -> int:
+        """
+        Number of rows of the train and validation data
+        """
+        return len(range(self.n_rows)[self.train_val]) if isinstance(self.train_val, slice) else len(self.train_val)
+
+    def get_fold(self, df: pd.DataFrame, fold: int) -> tuple:
+        """
+        Get the train and validation set of a fold
+        :param df: dataset the plan was computed for
+        :param fold: number of the fold
+        :return: tuple of train and validation set
+        """
+        train, val = self.folds[fold]
+        return df.iloc[train], df.iloc[val]
+
+    def get_low_fidelity_fold(self, n_train_rows: int) -> tuple:
+        """
+        Get a cheaper variant of the last fold with a shortened history: only the most recent rows of its train set
+        are used for training, the validation set stays the same
+        :param n_train_rows: number of the most recent rows of the train set to use
+        :return: tuple of the positions of the shortened train set and of the validation set
+        """
+        if self.datasplit not in ['timeseries-cv', 'train-val-test']:
+            raise Exception('A low-fidelity fold with a shortened history is only available for the datasplits '
+                            'timeseries-cv and train-val-test, the folds of ' + self.datasplit + ' are shuffled.')
+        train, val = self.folds[-1]
+        train_positions = np.sort(np.arange(self.n_rows)[train])
+        return to_indexer(train_positions[-n_train_rows:]), val
+
+    def get_train_val_test(self, df: pd.DataFrame) -> tuple:
+        """
+        Get the train and validation data as well as the test data
+        :param df: dataset the plan was computed for
+        :return: tuple of train and validation data and test data
+        """
+        return df.iloc[self.train_val], df.iloc[self.test]
+
+    def get_retrain_retest(self, df: pd.DataFrame) -> tuple:
+        """
+        Get the data to retrain the final model on as well as the data to test it on
+        :param df: dataset the plan was computed for
+        :return: tuple of retrain and test data
+        """
+        return df.iloc[self.retrain], df.iloc[self.retest]
+
+    def to_dict(self) -> dict:
+        """
+        Get a json serializable description of the plan, e.g. to store it as user attribute of an optuna study
+        :return: dictionary with the description of the plan
+        """
+        return {'n_rows': self.n_rows, 'datasplit': self.datasplit, 'train_val': describe_indexer(self.train_val),
+                'test': describe_indexer(self.test),
+                'folds': [[describe_indexer(train), describe_indexer(val)] for train, val in self.folds]}
+
+
+def get_train_val_test_positions(index: pd.DatetimeIndex, test_set_size_percentage: int,
+                                 test_year: int = 2021) -> tuple:
+    """
+    Get the positions of the train and validation data and of the test data.
+    The test set is either a whole year or the last test_set_size_percentage percent of the data.
+    :param index: index of the dataset
+    :param test_set_size_percentage: the size of the test set in percentage or 2021 to use a whole year as test set
+    :param test_year: year of the test set if test_set_size_percentage is 2021, the final model and the PCA use 2020
+    :return: tuple of positions of the train and validation data and of the test data
+    """
+    if test_set_size_percentage == 2021:
+        is_test = (index >= str(test_year) + '-01-01') & (index <= str(test_year) + '-12-31')
+        return to_indexer(np.flatnonzero(~is_test)), to_indexer(np.flatnonzero(is_test))
+    # same split as sklearn's train_test_split without shuffling
+    n_train_val = len(index) - math.ceil(test_set_size_percentage * 0.01 * len(index))
+    return slice(0, n_train_val), slice(n_train_val, len(index))
+
+
+def to_indexer(positions: np.array):
+    """
+    Convert positions to a slice if they are contiguous, as selecting a slice does not copy the data
+    :param positions: sorted or unsorted integer positions
+    :return: slice or the positions themselves
+    """
+    if len(positions) > 0 and np.all(np.diff(positions) == 1):
+        return slice(int(positions[0]), int(positions[-1]) + 1)
+    return np.asarray(positions)
+
+
+def describe_indexer(indexer) -> list:
+    """
+    Get a json serializable description of positions
+    :param indexer: slice or integer positions, see to_indexer()
+    :return: start and stop of a slice or list of the positions
+    """
+    return [indexer.start, indexer.stop] if isinstance(indexer, slice) else indexer.tolist()
+
+
+def get_split_plan(index: pd.DatetimeIndex, datasplit: str, n_splits: int, test_set_size_percentage: int,
+                   val_set_size_percentage: int) -> SplitPlan:
+    """
+    Get the split plan for a dataset, it is only computed once per index and datasplit in a process.
+    See :obj:`~ForeTiS.utils.split_plan.SplitPlan` for more information.
+    :return: split plan
+    """
+    key = (len(index), index[0] if len(index) > 0 else None, index[-1] if len(index) > 0 else None,
+           datasplit, n_splits, test_set_size_percentage, val_set_size_percentage)
+    if key not in _split_plans:
+        _split_plans[key] = SplitPlan(index=index, datasplit=datasplit, n_splits=n_splits,
+                                      test_set_size_percentage=test_set_size_percentage,
+                                      val_set_size_percentage=val_set_size_percentage)
+    return _split_plans[key]
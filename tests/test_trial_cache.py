@@ -0,0 +1,45 @@
+import types
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+optuna_optim = pytest.importorskip('ForeTiS.optimization.optuna_optim')
+trial_cache = pytest.importorskip('ForeTiS.optimization.trial_cache')
+
+
+def get_optuna_optim(cache_dir: str) -> optuna_optim.OptunaOptim:
+    """
+    Get an OptunaOptim instance with only the attributes needed to compute the cache keys
+    :param cache_dir: directory of the trial cache
+    :return: OptunaOptim instance
+    """
+    optim = optuna_optim.OptunaOptim.__new__(optuna_optim.OptunaOptim)
+    optim.trial_cache = trial_cache.TrialCache(cache_dir=cache_dir)
+    optim.dataset_fingerprints = {}
+    optim.target_column = 'y'
+    optim.current_model_name = 'ridge'
+    optim.user_input_params = {'batch_size': None, 'n_epochs': None, 'num_monte_carlo': None}
+    optim.get_split_plan = lambda: types.SimpleNamespace(to_dict=lambda: {'datasplit': 'timeseries-cv'})
+    optim.uses_incremental_folds = lambda: False
+    optim.measures_latency = lambda: False
+    return optim
+
+
+def test_featuresets_with_same_params_get_different_keys(tmp_path):
+    index = pd.date_range('2020-01-01', periods=8, freq='D')
+    featureset_a = pd.DataFrame({'x': np.arange(8.), 'y': np.ones(8)}, index=index)
+    featureset_b = pd.DataFrame({'x': np.arange(8.) * 2, 'y': np.ones(8)}, index=index)
+    optim = get_optuna_optim(cache_dir=str(tmp_path))
+    params = {'alpha': 0.1, 'pca': False}
+    folds = [(slice(0, 5), slice(5, 8))]
+
+    optim.dataset = featureset_a
+    keys_a = optim.get_fold_cache_keys(params=params, folds=folds, featureset_name='dataset_a')
+    optim.dataset = featureset_b
+    keys_b = optim.get_fold_cache_keys(params=params, folds=folds, featureset_name='dataset_b')
+
+    assert keys_a != keys_b
+    # the fingerprint of each featureset is computed once and reused by the later trials
+    optim.dataset = featureset_a
+    assert optim.get_fold_cache_keys(params=params, folds=folds, featureset_name='dataset_a') == keys_a